@@ -1,703 +1,793 @@
-import tkinter as tk
-from tkinter import messagebox
-from tkinter import scrolledtext
-import random
-from PIL import Image, ImageTk
-import pygame
-
-
-class RPGMapExplorer:
-    """
-    FEATURE: Cleared Map Layer added.
-    NEW FEATURE: Once the player leaves a normal terrain (F or G), it is marked as cleared
-                 and subsequent visits to that specific spot will not trigger a battle.
-    BATTLE CHANCE: Set to 25% (0.25) on uncleared 'F' and 'G' tiles.
-    """
-
-    def __init__(self, master):
-        self.master = master
-        master.title("RPG Adventure: Visual Battles - HARD MODE LIGHT")
-
-        # --- PYGAME & MUSIC SETUP ---
-        self.music_file = "game_music.mp3"
-        self.music_initialized = False
-
-        try:
-            pygame.mixer.init()
-            self.music_initialized = True
-            self.play_music()
-        except pygame.error as e:
-            print(f"Warning: Could not initialize Pygame mixer or load music. Error: {e}")
-
-        master.protocol("WM_DELETE_WINDOW", self.on_closing)
-
-        # --- Game Setup ---
-        self.map_size = 15
-        self.cell_size = 35
-        self.map_pixel_size = self.map_size * self.cell_size
-        self.player_pos = [0, 0]
-        self.game_over = False
-        self.in_dialogue = False
-        self.battle_window_open = False
-
-        # --- DIFFICULTY AND STATS ---
-        self.CRIT_CHANCE = 0.20
-        self.CRIT_MULTIPLIER = 1.5
-        self.BATTLE_CHANCE = 0.25  # 25% battle chance
-        self.player_stats = {
-            'Health': 90, 'MaxHealth': 90,
-            'Gold': 20, 'Level': 1,
-            'Attack': 10, 'XP': 0, 'NextLevel': 100
-        }
-        self.inventory = {'Health Potion': 0}
-        self.stat_vars = {}
-        self.enemy_gallery = [
-            {'name': 'Goblin', 'color': '#2ecc71', 'symbol': '👹'},
-            {'name': 'Orc Warrior', 'color': '#e74c3c', 'symbol': '👺'},
-            {'name': 'Dark Mage', 'color': '#8e44ad', 'symbol': '🧙‍♂️'},
-            {'name': 'Bandit', 'color': '#f39c12', 'symbol': '🦹'}
-        ]
-
-        self.player_image_path = "rambo_okan.png"
-        self.player_photo = None
-        self.player_photo_tk_icon = None
-        self.player_icon = '🤠'
-        self.load_player_image()
-
-        # --- RIDDLES LIST (Expanded and Translated) ---
-        self.riddles = [
-            {
-                'question': "Filled by day, emptied by night. What is it?",
-                'answer': "shoe",
-                'reward': {'type': 'MaxHealth', 'amount': 15}
-            },
-            {
-                'question': "It has teeth but cannot eat. What is it?",
-                'answer': "comb",
-                'reward': {'type': 'Gold', 'amount': 50}
-            },
-            {
-                'question': "It runs but never walks, often murmurs, never talks, has a bed but never sleeps, has a mouth but never eats. What is it?",
-                'answer': "river",
-                'reward': {'type': 'Attack', 'amount': 3}
-            },
-            {
-                'question': "What gets smaller the more you add to it?",
-                'answer': "hole",
-                'reward': {'type': 'Health', 'amount': 30}
-            },
-            {
-                'question': "What has an eye but cannot see?",
-                'answer': "needle",
-                'reward': {'type': 'MaxHealth', 'amount': 10}
-            },
-            {
-                'question': "I am tall when I am young, and I am short when I am old. What am I?",
-                'answer': "candle",
-                'reward': {'type': 'Gold', 'amount': 40}
-            },
-            {
-                'question': "What is full of holes but still holds water?",
-                'answer': "sponge",
-                'reward': {'type': 'Attack', 'amount': 4}
-            },
-        ]
-
-        # --- BACKGROUND IMAGE SETUP (FOR ENTIRE WINDOW) ---
-        self.background_image_path = "background.jpg"
-        self.background_photo = None
-
-        master.update_idletasks()
-        initial_width = master.winfo_width()
-        initial_height = master.winfo_height()
-        if initial_width < 100 or initial_height < 100:
-            initial_width, initial_height = 800, 700
-            master.geometry(f"{initial_width}x{initial_height}")
-
-        self.load_root_background_image(initial_width, initial_height)
-
-        self.bg_label = tk.Label(master, image=self.background_photo)
-        self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-        self.bg_label.image = self.background_photo
-
-        # --- Terrain Types ---
-        self.terrains = {
-            'F': {'color': '#27ae60', 'symbol': '🌲', 'name': 'Forest', 'message': 'Dark woods.'},
-            'M': {'color': '#7f8c8d', 'symbol': '⛰', 'name': 'Mountain Pass', 'message': 'Rocky path. (-2 Health)'},
-            'W': {'color': '#3498db', 'symbol': '🌊', 'name': 'River', 'message': 'Cool waters.'},
-            'T': {'color': '#f39c12', 'symbol': '🏠', 'name': 'Town', 'message': 'A place to rest.'},
-            'G': {'color': '#88b04b', 'symbol': '🟩', 'name': 'Grassland', 'message': 'Open field.'},
-            '?': {'color': '#8e44ad', 'symbol': '❓', 'name': 'Mystery Spot', 'message': 'Something strange is here...'},
-            'K': {'color': '#c0392b', 'symbol': '🏰', 'name': 'King\'s Castle', 'message': 'The Goal!'},
-            'E': {'color': '#5a4d45', 'symbol': '👴', 'name': 'Elder\'s Hut',
-                  'message': 'An old man sits here, waiting to test your wits.'}
-        }
-
-        self.generate_map()
-
-        # New: Cleared map layer to prevent battles on revisited common tiles (F, G)
-        self.cleared_map = [[False for _ in range(self.map_size)] for _ in range(self.map_size)]
-        self.cleared_map[0][0] = True  # Starting tile is considered cleared
-
-        # --- GUI Components ---
-        WIDGET_BG = "#34495e"
-        WIDGET_FG = "#ecf0f1"
-
-        self.stats_frame = tk.Frame(master, bg=WIDGET_BG, padx=10, pady=5)
-        self.stats_frame.pack(fill='x', padx=10, pady=(5, 5))
-        self.setup_stats_display(WIDGET_BG, WIDGET_FG)
-
-        self.inventory_frame = tk.Frame(master, bg=WIDGET_BG, padx=10, pady=5)
-        self.inventory_frame.pack(fill='x', padx=10, pady=(5, 10))
-        self.setup_inventory_display(WIDGET_BG, WIDGET_FG)
-
-        self.canvas = tk.Canvas(master, width=self.map_pixel_size,
-                                height=self.map_pixel_size,
-                                bg="#ecf0f1", highlightthickness=0)
-        self.canvas.pack(padx=10, pady=10)
-
-        self.status_text = tk.StringVar(
-            value="Mission: Reach the King's Castle (🏰) in the bottom right! (HARD MODE LIGHT)")
-        self.status_label = tk.Label(master, textvariable=self.status_text,
-                                     font=('Helvetica', 10), bg=WIDGET_BG, fg="#f1c40f", pady=5)
-        self.status_label.pack(fill='x')
-
-        # Key Bindings
-        master.bind('<Up>', lambda e: self.move_player('up'))
-        master.bind('<Down>', lambda e: self.move_player('down'))
-        master.bind('<Left>', lambda e: self.move_player('left'))
-        master.bind('<Right>', lambda e: self.move_player('right'))
-        master.bind('1', lambda e: self.handle_dialogue_choice(1))
-        master.bind('2', lambda e: self.handle_dialogue_choice(2))
-        master.bind('3', lambda e: self.handle_dialogue_choice(3))
-
-        master.bind('<Configure>', self.on_resize)
-
-        self.draw_map()
-        self.draw_player()
-        self.update_stats_display()
-
-    # --- HELPER METHODS ---
-
-    def on_closing(self):
-        """Stops music and closes the window safely."""
-        if self.music_initialized:
-            pygame.mixer.music.stop()
-            pygame.mixer.quit()
-        self.master.destroy()
-
-    def play_music(self):
-        """Starts background music."""
-        if not self.music_initialized: return
-        try:
-            pygame.mixer.music.load(self.music_file)
-            pygame.mixer.music.play(-1, 10.0)
-            pygame.mixer.music.set_volume(0.3)
-        except pygame.error as e:
-            self.music_initialized = False
-
-    def on_resize(self, event):
-        """Resizes the background image when the window size changes."""
-        if event.widget == self.master:
-            self.load_root_background_image(event.width, event.height)
-            if self.bg_label:
-                self.bg_label.config(image=self.background_photo)
-                self.bg_label.image = self.background_photo
-
-    def load_root_background_image(self, width, height):
-        """Loads and prepares the background image for the main window."""
-        if width == 1 or height == 1: return
-        try:
-            img = Image.open(self.background_image_path)
-            img = img.resize((width, height), Image.LANCZOS)
-            self.background_photo = ImageTk.PhotoImage(img)
-        except FileNotFoundError:
-            self.background_photo = None
-            self.master.configure(bg="#2c3e50")
-        except Exception as e:
-            self.background_photo = None
-            self.master.configure(bg="#2c3e50")
-
-    def setup_stats_display(self, bg, fg):
-        """Initializes the display widgets for player stats."""
-        stats = ['Health', 'Gold', 'Level', 'XP']
-        for i, stat in enumerate(stats):
-            var = tk.StringVar()
-            self.stat_vars[stat] = var
-            lbl = tk.Label(self.stats_frame, textvariable=var, font=('Helvetica', 9, 'bold'), bg=bg, fg=fg)
-            lbl.grid(row=0, column=i, padx=10)
-
-    def update_stats_display(self):
-        """Updates the text variables displaying player statistics."""
-        self.stat_vars['Health'].set(f"❤️ {self.player_stats['Health']}/{self.player_stats['MaxHealth']}")
-        self.stat_vars['Gold'].set(f"💰 {self.player_stats['Gold']}")
-        self.stat_vars['Level'].set(f"⭐ Lvl {self.player_stats['Level']}")
-        self.stat_vars['XP'].set(f"✨ XP {self.player_stats['XP']}/{self.player_stats['NextLevel']}")
-
-    def gain_xp(self, amount):
-        """Handles XP gain and checks for level up."""
-        self.player_stats['XP'] += amount
-        if self.player_stats['XP'] >= self.player_stats['NextLevel']:
-            self.player_stats['Level'] += 1
-            self.player_stats['XP'] -= self.player_stats['NextLevel']
-            self.player_stats['NextLevel'] = int(self.player_stats['NextLevel'] * 1.5)
-            self.player_stats['MaxHealth'] += 20
-            self.player_stats['Health'] = self.player_stats['MaxHealth']
-            self.player_stats['Attack'] += 5
-            messagebox.showinfo("Level Up!",
-                                f"CONGRATULATIONS! You reached Level {self.player_stats['Level']}! You feel much stronger.")
-        self.update_stats_display()
-
-    def setup_inventory_display(self, bg, fg):
-        """Sets up the inventory display and use potion button."""
-        self.potion_count_var = tk.StringVar(value=f"Potions: {self.inventory.get('Health Potion', 0)}")
-        potion_label = tk.Label(self.inventory_frame, textvariable=self.potion_count_var,
-                                font=('Helvetica', 10, 'bold'), bg=bg, fg=fg, padx=10)
-        potion_label.pack(side=tk.LEFT, padx=(0, 15))
-        use_button = tk.Button(self.inventory_frame, text="Use Potion (+30 Health)", command=self.use_potion,
-                               font=('Helvetica', 10, 'bold'), bg="#27ae60", fg="white", relief='raised')
-        use_button.pack(side=tk.LEFT)
-
-    def update_inventory_display(self):
-        """Updates the potion count display."""
-        count = self.inventory.get('Health Potion', 0)
-        self.potion_count_var.set(f"Potions: {count}")
-
-    def use_potion(self):
-        """Allows the player to use a health potion."""
-        if self.inventory.get('Health Potion', 0) > 0:
-            if self.player_stats['Health'] < self.player_stats['MaxHealth']:
-                self.inventory['Health Potion'] -= 1
-                heal = 30
-                self.player_stats['Health'] = min(self.player_stats['MaxHealth'], self.player_stats['Health'] + heal)
-                self.update_stats_display()
-                self.update_inventory_display()
-                self.status_text.set("You used a potion and restored 30 Health!")
-            else:
-                self.status_text.set("You are already at full health!")
-        else:
-            self.status_text.set("You have no health potions left!")
-
-    def generate_map(self):
-        """Creates the initial game map with terrains and special spots."""
-        keys = ['F', 'M', 'W', 'G', 'F', 'G']
-        self.map_grid = [[random.choice(keys) for _ in range(self.map_size)] for _ in range(self.map_size)]
-        self.map_grid[0][0] = 'G'
-        self.map_grid[self.map_size - 1][self.map_size - 1] = 'K'
-        num_towns = random.randint(3, 6)
-        towns_placed = 0
-        while towns_placed < num_towns:
-            tr, tc = random.randint(1, self.map_size - 2), random.randint(1, self.map_size - 2)
-            if self.map_grid[tr][tc] not in ['T', 'K'] and (tr, tc) != (0, 0):
-                self.map_grid[tr][tc] = 'T'
-                towns_placed += 1
-
-        # Place '?' mystery spots
-        for _ in range(4):
-            self.map_grid[random.randint(1, 13)][random.randint(1, 13)] = '?'
-
-        # Place 'E' Elder's hut spots
-        num_elders = random.randint(2, 4)
-        elders_placed = 0
-        while elders_placed < num_elders:
-            er, ec = random.randint(1, self.map_size - 2), random.randint(1, self.map_size - 2)
-            if self.map_grid[er][ec] not in ['T', 'K', '?', 'E'] and (er, ec) != (0, 0):
-                self.map_grid[er][ec] = 'E'
-                elders_placed += 1
-
-    def load_player_image(self):
-        """Loads and prepares the player image for both large and map icon display."""
-        try:
-            img = Image.open(self.player_image_path)
-            img = img.resize((120, 120), Image.LANCZOS)
-            self.player_photo = ImageTk.PhotoImage(img)
-            img_icon = Image.open(self.player_image_path)
-            img = img_icon.resize((35, 35), Image.LANCZOS)
-            self.player_photo_tk_icon = ImageTk.PhotoImage(img)
-        except FileNotFoundError:
-            self.player_photo = None;
-            self.player_photo_tk_icon = None
-        except Exception as e:
-            self.player_photo = None;
-            self.player_photo_tk_icon = None
-
-    def draw_map(self):
-        """Draws the map grid on the canvas."""
-        self.canvas.delete("all")
-        for r in range(self.map_size):
-            for c in range(self.map_size):
-                t = self.terrains[self.map_grid[r][c]]
-                x1, y1 = c * self.cell_size, r * self.cell_size
-                self.canvas.create_rectangle(x1, y1, x1 + self.cell_size, y1 + self.cell_size, fill=t['color'],
-                                             outline="#bdc3c7")
-                self.canvas.create_text(x1 + self.cell_size / 2, y1 + self.cell_size / 2, text=t['symbol'],
-                                        font=('Segoe UI Emoji', 14), fill="black")
-
-    def draw_player(self):
-        """Draws the player icon at the current position."""
-        self.canvas.delete("player")
-        r, c = self.player_pos
-        x, y = c * self.cell_size + self.cell_size / 2, r * self.cell_size + self.cell_size / 2
-        if self.player_photo_tk_icon:
-            self.canvas.create_image(x, y, image=self.player_photo_tk_icon, tags="player")
-        else:
-            self.canvas.create_text(x, y, text=self.player_icon, font=('Segoe UI Emoji', 18), tags="player")
-
-    def move_player(self, d):
-        """Moves the player and marks the previous tile as cleared."""
-        if self.game_over or self.in_dialogue or self.battle_window_open: return
-
-        # Save the current position to mark as cleared
-        old_r, old_c = self.player_pos
-
-        nr, nc = self.player_pos
-        if d == 'up':
-            nr -= 1
-        elif d == 'down':
-            nr += 1
-        elif d == 'left':
-            nc -= 1
-        elif d == 'right':
-            nc += 1
-
-        if 0 <= nr < self.map_size and 0 <= nc < self.map_size:
-            # Mark the previous tile as cleared if it's a common terrain (F or G)
-            old_key = self.map_grid[old_r][old_c]
-            if old_key in ['F', 'G']:
-                self.cleared_map[old_r][old_c] = True
-
-            self.player_pos = [nr, nc]
-            self.draw_player()
-            self.handle_encounter(nr, nc)
-        else:
-            self.status_text.set("You cannot move further in that direction!")
-
-    def handle_encounter(self, r, c):
-        """Triggers specific events based on the terrain."""
-        key = self.map_grid[r][c]
-
-        if key == 'K':
-            messagebox.showinfo("VICTORY!", "You reached the King's Castle! You won the game.")
-            self.game_over = True;
-            self.on_closing()
-        elif key == 'M':
-            self.take_damage(2)
-            self.status_text.set("Mountain path is rough. -2 Health.")
-        elif key == 'T':
-            self.start_dialogue()
-        elif key == '?':
-            self.trigger_mystery_event()
-        elif key == 'E':
-            self.trigger_riddle()
-        elif key in ['F', 'G']:
-            # Check if the tile has already been cleared
-            if self.cleared_map[r][c]:
-                self.status_text.set(f"Location: {self.terrains[key]['name']} - The area is quiet and safe.")
-                return
-
-                # If not cleared, check for battle chance
-            if random.random() < self.BATTLE_CHANCE:
-                self.initiate_battle()
-            else:
-                self.update_status()
-
-    def trigger_riddle(self):
-        """Starts a riddle encounter with the Elder."""
-        self.in_dialogue = True
-        riddle = random.choice(self.riddles)
-
-        try:
-            riddle_win = tk.Toplevel(self.master)
-            riddle_win.title("👴 ELDER'S RIDDLE!")
-            riddle_win.geometry("350x180")
-            riddle_win.configure(bg="#34495e")
-            riddle_win.resizable(False, False)
-            riddle_win.attributes("-topmost", True)
-
-            tk.Label(riddle_win, text="Old Man: 'Welcome, young traveler. Let's test your wits.'",
-                     font=('Helvetica', 10, 'italic'), bg="#34495e", fg="#f1c40f", wraplength=300).pack(pady=5)
-            tk.Label(riddle_win, text=riddle['question'], font=('Helvetica', 12, 'bold'), bg="#34495e", fg="white",
-                     wraplength=300).pack(pady=5)
-
-            answer_var = tk.StringVar()
-            answer_entry = tk.Entry(riddle_win, textvariable=answer_var, font=('Helvetica', 10), width=30)
-            answer_entry.pack(pady=5)
-            answer_entry.focus_set()
-
-            def submit_answer():
-                player_answer = answer_var.get().strip().lower()
-                correct_answer = riddle['answer'].lower()
-                riddle_win.destroy()
-
-                if player_answer == correct_answer:
-                    reward_type = riddle['reward']['type']
-                    reward_amount = riddle['reward']['amount']
-                    self.apply_reward(reward_type, reward_amount)
-                    messagebox.showinfo("Correct Answer!",
-                                        f"Old Man: 'Your mind is sharp! Take your reward!'\nGain: {reward_amount} {reward_type}!")
-                else:
-                    messagebox.showerror("Wrong Answer",
-                                         f"Old Man: 'Hmm, you couldn't guess it.'\nCorrect answer: **{riddle['answer']}**.")
-
-                self.in_dialogue = False
-                self.update_stats_display()
-                self.update_status()
-
-            tk.Button(riddle_win, text="Answer", command=submit_answer, bg="#27ae60", fg="white").pack(pady=10)
-
-            riddle_win.protocol("WM_DELETE_WINDOW", lambda: [riddle_win.destroy(), setattr(self, 'in_dialogue', False),
-                                                             self.update_status()])
-
-        except Exception as e:
-            self.in_dialogue = False
-            messagebox.showerror("Error", f"An error occurred in the riddle event: {e}")
-            self.update_status()
-
-    def apply_reward(self, reward_type, amount):
-        """Applies a given reward to the player's stats."""
-        if reward_type == 'Health':
-            self.player_stats['Health'] = min(self.player_stats['MaxHealth'], self.player_stats['Health'] + amount)
-        elif reward_type == 'MaxHealth':
-            self.player_stats['MaxHealth'] += amount
-            self.player_stats['Health'] = min(self.player_stats['MaxHealth'], self.player_stats['Health'] + amount)
-        elif reward_type == 'Gold':
-            self.player_stats['Gold'] += amount
-        elif reward_type == 'Attack':
-            self.player_stats['Attack'] += amount
-
-    def die(self):
-        """Handles player death and ends the game."""
-        messagebox.showerror("You Died", "Your adventure has ended.");
-        self.game_over = True
-        self.on_closing()
-
-    def take_damage(self, amount):
-        """Subtracts health and checks if the player is dead."""
-        self.player_stats['Health'] -= amount
-        self.update_stats_display()
-        if self.player_stats['Health'] <= 0:
-            self.die()
-
-    def check_for_crit(self):
-        """Checks if a critical hit occurs."""
-        return random.random() < self.CRIT_CHANCE
-
-    def trigger_mystery_event(self):
-        """Triggers a random risk/reward event."""
-        events = [
-            {
-                "text": "You found an ancient altar. It says 'Gain power with blood'.\nWould you sacrifice some Health for Attack power?",
-                "cost_type": "health", "cost_val": 20, "reward_type": "attack", "reward_val": 5,
-                "yes_msg": "You cut your hand. It hurts but you feel stronger! (-20 Health, +5 Attack)",
-                "no_msg": "You decide not to risk it and walk away."},
-            {"text": "A shining pouch is on the ground, but the area looks trapped.\nDo you try to grab it?",
-             "cost_type": "chance_damage", "cost_val": 25, "reward_type": "gold", "reward_val": 50,
-             "yes_msg": "Lucky! You grabbed the pouch.", "fail_msg": "The trap sprang! Arrows hit you. (-25 Health)",
-             "no_msg": "You prioritize your health over quick riches."},
-        ]
-
-        event = random.choice(events)
-        choice = messagebox.askyesno("Mystery Event", event["text"])
-
-        if choice:
-            if event["cost_type"] == "health":
-                self.take_damage(event["cost_val"])
-                self.player_stats['Attack'] += event["reward_val"]
-                messagebox.showinfo("Result", event["yes_msg"])
-            elif event["cost_type"] == "chance_damage":
-                if random.random() > 0.55:
-                    self.player_stats['Gold'] += event["reward_val"]
-                    messagebox.showinfo("Success!", f"{event['yes_msg']} (+{event['reward_val']} Gold)")
-                else:
-                    self.take_damage(event["cost_val"])
-                    messagebox.showerror("Failure!", event["fail_msg"])
-        else:
-            self.status_text.set(event["no_msg"])
-
-        self.update_stats_display()
-
-    def initiate_battle(self):
-        """Starts a new battle encounter."""
-        self.battle_window_open = True
-        self.current_enemy = random.choice(self.enemy_gallery)
-        lvl_mod_health = self.player_stats['Level'] * 4
-        lvl_mod_attack = self.player_stats['Level'] * 1.5
-        self.enemy_stats = {
-            'Health': random.randint(30 + int(lvl_mod_health), 50 + int(lvl_mod_health)),
-            'MaxHealth': 0,
-            'Attack': random.randint(7 + int(lvl_mod_attack), 12 + int(lvl_mod_attack))
-        }
-        self.enemy_stats['MaxHealth'] = self.enemy_stats['Health']
-        self.battle_win = tk.Toplevel(self.master)
-        self.battle_win.title("⚔️ Battle!")
-        self.battle_win.geometry("500x400")
-        self.battle_win.configure(bg="#2c3e50")
-        self.battle_win.protocol("WM_DELETE_WINDOW", self.close_battle_forced)
-        top_frame = tk.Frame(self.battle_win, bg="#34495e", pady=10)
-        top_frame.pack(fill='x')
-
-        if self.player_photo:
-            player_img_label = tk.Label(top_frame, image=self.player_photo, bg="#34495e")
-            player_img_label.image = self.player_photo
-            player_img_label.pack(side=tk.LEFT, padx=20)
-        else:
-            self.player_photo_canvas = tk.Canvas(top_frame, width=120, height=120, bg='#3498db', highlightthickness=2,
-                                                 highlightbackground="white")
-            self.player_photo_canvas.pack(side=tk.LEFT, padx=20)
-            self.player_photo_canvas.create_text(60, 60, text=self.player_icon, font=('Arial', 30))
-
-        self.player_battle_lbl = tk.Label(top_frame, text=f"You\nHealth: {self.player_stats['Health']}",
-                                          font=('Arial', 12, 'bold'), bg="#34495e", fg="white")
-        self.player_battle_lbl.pack(side=tk.LEFT)
-        self.enemy_photo_canvas = tk.Canvas(top_frame, width=120, height=120, bg=self.current_enemy['color'],
-                                            highlightthickness=2, highlightbackground="red")
-        self.enemy_photo_canvas.pack(side=tk.RIGHT, padx=20)
-        self.enemy_photo_canvas.create_text(60, 60, text=self.current_enemy['symbol'], font=('Arial', 30))
-        self.enemy_battle_lbl = tk.Label(top_frame,
-                                         text=f"{self.current_enemy['name']}\nHealth: {self.enemy_stats['Health']}",
-                                         font=('Arial', 12, 'bold'), bg="#34495e", fg="red")
-        self.enemy_battle_lbl.pack(side=tk.RIGHT)
-        log_frame = tk.Frame(self.battle_win, bg="white", padx=5, pady=5)
-        log_frame.pack(fill='both', expand=True, padx=10, pady=10)
-        self.battle_log = scrolledtext.ScrolledText(log_frame, height=10, state='disabled', font=('Courier', 10))
-        self.battle_log.pack(fill='both', expand=True)
-        self.log_message(f"A fierce {self.current_enemy['name']} appeared!")
-        btn_frame = tk.Frame(self.battle_win, bg="#2c3e50", pady=10)
-        btn_frame.pack(fill='x')
-        atk_btn = tk.Button(btn_frame, text="⚔️ ATTACK", command=self.battle_round, bg="#c0392b", fg="white",
-                            font=('Arial', 14, 'bold'), padx=20)
-        atk_btn.pack()
-
-    def log_message(self, msg):
-        """Adds a message to the battle log."""
-        self.battle_log.config(state='normal')
-        self.battle_log.insert(tk.END, msg + "\n")
-        self.battle_log.see(tk.END)
-        self.battle_log.config(state='disabled')
-
-    def battle_round(self):
-        """Executes one round of combat (player attack, enemy attack, checks)."""
-        if self.enemy_stats['Health'] <= 0:
-            self.log_message("> The enemy is already defeated. Claim your victory!")
-            return
-
-        # Player Attack
-        is_player_crit = self.check_for_crit()
-        p_dmg = self.player_stats['Attack'] + random.randint(-3, 5)
-        if is_player_crit:
-            p_dmg = int(p_dmg * self.CRIT_MULTIPLIER)
-            self.log_message(f"⭐ CRITICAL HIT! ⭐")
-
-        self.enemy_stats['Health'] -= p_dmg
-        self.log_message(f"> You dealt {p_dmg} damage to {self.current_enemy['name']}!")
-
-        # Enemy Check (Defeat)
-        if self.enemy_stats['Health'] <= 0:
-            self.enemy_stats['Health'] = 0
-            self.player_battle_lbl.config(text=f"You\nHealth: {self.player_stats['Health']}")
-            self.enemy_battle_lbl.config(text=f"{self.current_enemy['name']}\nHealth: 0")
-            self.log_message(f"--- {self.current_enemy['name']} DEFEATED! ---")
-
-            gold = random.randint(10, 25) * self.player_stats['Level']
-            xp = random.randint(30, 50)
-            self.player_stats['Gold'] += gold
-            self.log_message(f"Loot: {gold} Gold, {xp} XP.")
-            self.gain_xp(xp)
-
-            # Remove Attack button, add Exit button
-            btn_frame = self.battle_win.winfo_children()[-1]
-            for widget in btn_frame.winfo_children():
-                widget.destroy()
-            close_btn = tk.Button(btn_frame, text="Claim Victory and Exit", command=self.close_battle_win, bg="#27ae60",
-                                  fg="white", font=('Arial', 12))
-            close_btn.pack(pady=10)
-            return
-
-        # Enemy Attack
-        is_enemy_crit = self.check_for_crit()
-        e_dmg = self.enemy_stats['Attack'] + random.randint(-2, 3)
-        if is_enemy_crit:
-            e_dmg = int(e_dmg * self.CRIT_MULTIPLIER)
-            self.log_message(f"💥 ENEMY CRITICAL HIT! 💥")
-
-        self.player_stats['Health'] -= e_dmg
-        self.log_message(f"> The enemy retaliated for {e_dmg} damage!")
-
-        # Update Stats
-        self.player_battle_lbl.config(text=f"You\nHealth: {self.player_stats['Health']}")
-        self.enemy_battle_lbl.config(text=f"{self.current_enemy['name']}\nHealth: {self.enemy_stats['Health']}")
-        self.update_stats_display()
-
-        # Player Check (Defeat)
-        if self.player_stats['Health'] <= 0:
-            self.battle_win.destroy()
-            self.die()
-
-    def close_battle_win(self):
-        """Closes the battle window normally after victory."""
-        self.battle_window_open = False
-        self.battle_win.destroy()
-        self.update_status()
-
-    def close_battle_forced(self):
-        """Prevents closing the battle window while combat is ongoing."""
-        if self.player_stats['Health'] > 0 and self.enemy_stats['Health'] > 0:
-            messagebox.showwarning("Hold On!", "You cannot escape the battle! You must fight to the end.")
-        else:
-            self.close_battle_win()
-
-    def start_dialogue(self):
-        """Initiates the town/tavern dialogue."""
-        if self.in_dialogue: return
-        self.in_dialogue = True
-        self.town_has_potion = random.choice([True, False])
-        potion_price = 25
-        d_text = "TAVERN KEEPER: 'Welcome, traveler. What do you need?'\n\n"
-        d_text += "1) Rest (Free, Full Health)\n"
-        if self.town_has_potion:
-            d_text += f"2) Buy Potion ({potion_price} Gold)\n"
-        else:
-            d_text += "2) Buy Potion (SOLD OUT)\n"
-        d_text += "3) Exit Town"
-        self.status_text.set(d_text)
-
-    def handle_dialogue_choice(self, c):
-        """Handles the player's choice in town dialogue."""
-        if not self.in_dialogue: return
-        msg = ""
-        potion_price = 25
-        if c == 1:
-            self.player_stats['Health'] = self.player_stats['MaxHealth'];
-            msg = "Tavern Keeper: 'Sleep well.' (Health Restored)"
-        elif c == 2:
-            if not self.town_has_potion:
-                msg = "Tavern Keeper: 'Sorry, the last caravan hasn't arrived.' (SOLD OUT)"
-            elif self.player_stats['Gold'] >= potion_price:
-                self.player_stats['Gold'] -= potion_price
-                self.inventory['Health Potion'] += 1
-                msg = "Tavern Keeper: 'Here is your potion.' (-25 Gold, +1 Potion)"
-            else:
-                msg = "Tavern Keeper: 'You don't have enough coin, friend.'"
-        elif c == 3:
-            msg = "Tavern Keeper: 'Safe travels!'"
-        else:
-            return
-        self.in_dialogue = False
-        messagebox.showinfo("Town Dialogue", msg)
-        self.update_stats_display()
-        self.update_inventory_display()
-        self.update_status()
-
-    def update_status(self):
-        """Updates the status bar based on the player's current location."""
-        if self.in_dialogue or self.battle_window_open: return
-        r, c = self.player_pos
-        t = self.terrains[self.map_grid[r][c]]
-        self.status_text.set(f"Location: {t['name']} - {t['message']}")
-
-
-if __name__ == '__main__':
-    root = tk.Tk()
-    game = RPGMapExplorer(root)
-    root.focus_set()
-    root.mainloop()
\ No newline at end of file
+import random
+import time
+import tkinter as tk
+from collections import deque
+from tkinter import messagebox
+from tkinter import scrolledtext
+
+from assets import AssetManager
+from audio import MusicPlayer
+from background import BackgroundResizer
+from battle_log import BattleLog
+from battle_odds import expected_loss, loss_percentile, odds_for
+from event_bus import EventBus
+from fog import FogOfWar
+from game_engine import GameEngine
+from game_loop import GameLoop
+from lazy_imports import import_report
+from map_renderer import MapRenderer
+from pathfinding import TravelPlanner, directions_along, standard_targets
+from poi import compass_arrow
+from replay import CLASSIC_MAP, NOISE_MAP, InputRecorder
+from savegame import AutoSaver, load_game
+from startup import StartupLoader
+
+AUTOSAVE_MS = 5000  # interval between incremental autosaves (--save DIR)
+TRAVEL_STEP_MS = 120  # pace of auto-travel moves
+ROUTE_PLAN_MS = 4  # time per game tick a route search may take before it resumes on the next one
+COMPASS_KEYS = 'TE?'  # nearest of each shown in the compass, plus the castle
+COMPASS_RANGE = 60  # steps; farther POIs are left off the compass
+SIGHT_RADIUS = 4  # fog of war: tiles the player can see (mountains block sight)
+# Stat label -> (text format, player_stats fields it shows)
+STAT_LABELS = {
+    'Health': ("❤️ {Health}/{MaxHealth}", ('Health', 'MaxHealth')),
+    'Gold': ("💰 {Gold}", ('Gold',)),
+    'Level': ("⭐ Lvl {Level}", ('Level',)),
+    'XP': ("✨ XP {XP}/{NextLevel}", ('XP', 'NextLevel')),
+}
+LABELS_OF_STAT = {field: [label for label, (_, fields) in STAT_LABELS.items() if field in fields]
+                  for _, fields in STAT_LABELS.values() for field in fields}
+
+
+class RPGMapExplorer:
+    """
+    Tk view on top of GameEngine. All rules (movement, encounters, battles, dialogues)
+    live in game_engine.py; this class only draws the state and turns the engine's
+    events into widgets, message boxes and status text.
+    FEATURE: Cleared Map Layer added.
+    BATTLE CHANCE: Set to 25% (0.25) on uncleared 'F' and 'G' tiles.
+    """
+
+    def __init__(self, master, world=None, benchmark_startup=False, seed=None, record_path=None, save_dir=None,
+                 map_size=None, noise_map=False, battle_log_path=None, fast_battles=False, fog=True):
+        self.master = master
+        master.title("RPG Adventure: Visual Battles - HARD MODE LIGHT")
+
+        # Slow independent steps (audio, images, world) run concurrently once the window is up
+        self.startup = StartupLoader(master)
+
+        # --- PYGAME & MUSIC SETUP (pygame is only imported when the music starts) ---
+        self.music_file = "game_music.mp3"
+        self.music = MusicPlayer(self.music_file)
+
+        master.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+        # --- Game Setup ---
+        self.engine = None  # built on a startup worker, see on_engine_ready
+        self.renderer = None
+        self.map_size = world.map_size if world is not None else (map_size or 15)
+        # noise_map: build the grid with mapgen (NumPy noise biomes) instead of the classic generator
+        self.noise_map = noise_map and world is None
+        # An explicit seed makes the session reproducible; with record_path every input is
+        # recorded and written on close, so replay.py can rebuild the session headlessly
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.record_path = record_path
+        self.battle_log_path = battle_log_path  # full battle history is exported here on close
+        self.fast_battles = fast_battles  # start with fast-forward battles on (F toggles)
+        self.fog_enabled = fog  # fog of war: tiles stay hidden until they have been in sight
+        self.fog = None
+        self.recorder = InputRecorder(self.seed, self.map_size, world.seed if world is not None else self.seed,
+                                      NOISE_MAP if self.noise_map else CLASSIC_MAP) if record_path else None
+        # With save_dir the game resumes from the save there and autosaves every AUTOSAVE_MS
+        self.autosaver = AutoSaver(save_dir) if save_dir else None
+        self.resumed = False
+        self.cell_size = 35
+        # The canvas is a camera window of view_tiles x view_tiles onto the (possibly huge) world
+        self.view_tiles = min(self.map_size or 15, 15)
+        self.map_pixel_size = self.view_tiles * self.cell_size
+        self.battle_window_open = False
+        self.stat_vars = {}
+
+        self.assets = AssetManager()
+        self.player_image_path = "rambo_okan.png"
+        self.player_photo = None
+        self.player_photo_tk_icon = None
+        self.player_icon = '🤠'
+
+        # --- BACKGROUND IMAGE SETUP (FOR ENTIRE WINDOW) ---
+        self.background_image_path = "background.jpg"
+        self.background_photo = None
+
+        master.update_idletasks()
+        initial_width = master.winfo_width()
+        initial_height = master.winfo_height()
+        if initial_width < 100 or initial_height < 100:
+            initial_width, initial_height = 800, 700
+            master.geometry(f"{initial_width}x{initial_height}")
+
+        self.bg_label = tk.Label(master, bg="#2c3e50")
+        self.bg_label.place(x=0, y=0, relwidth=1, relheight=1)
+        self.background = BackgroundResizer(master, self.background_image_path, self.set_background,
+                                            assets=self.assets)
+        self.background.request(initial_width, initial_height)
+
+        # --- GUI Components ---
+        WIDGET_BG = "#34495e"
+        WIDGET_FG = "#ecf0f1"
+
+        self.stats_frame = tk.Frame(master, bg=WIDGET_BG, padx=10, pady=5)
+        self.stats_frame.pack(fill='x', padx=10, pady=(5, 5))
+        self.setup_stats_display(WIDGET_BG, WIDGET_FG)
+
+        self.inventory_frame = tk.Frame(master, bg=WIDGET_BG, padx=10, pady=5)
+        self.inventory_frame.pack(fill='x', padx=10, pady=(5, 10))
+        self.setup_inventory_display(WIDGET_BG, WIDGET_FG)
+
+        self.canvas = tk.Canvas(master, width=self.map_pixel_size,
+                                height=self.map_pixel_size,
+                                bg="#ecf0f1", highlightthickness=0)
+        self.canvas.pack(padx=10, pady=10)
+
+        self.status_text = tk.StringVar(
+            value="Mission: Reach the King's Castle (🏰) in the bottom right! (HARD MODE LIGHT)")
+        self.status_label = tk.Label(master, textvariable=self.status_text,
+                                     font=('Helvetica', 10), bg=WIDGET_BG, fg="#f1c40f", pady=5)
+        self.status_label.pack(fill='x')
+        self.route_text = tk.StringVar(value="")
+        tk.Label(master, textvariable=self.route_text, font=('Helvetica', 9), bg=WIDGET_BG, fg="white").pack(fill='x')
+
+        # Input goes through the bus (coalesced per frame); engine events come back out of it
+        self.loop = GameLoop(master)
+        self.bus = EventBus(master, movement_blocked=self.movement_blocked, auto_flush=False)
+        self.loop.add_system(lambda dt: self.bus.flush())
+        self.loop.add_system(self.travel_tick)
+        self.planner = None  # built with the engine, see create_engine
+        self.travel_moves = deque()
+        self.route_search = None  # (target, search generator) while a route is being planned
+        self.travel_timer = 0.0
+        self.loop.add_renderer(self.render)
+        self.dirty_stat_labels = set()
+        self.label_texts = {}  # label name -> text last pushed to its StringVar
+        self.combat_log = BattleLog()  # visible-line ring + full history behind the battle window's log
+        self.bus.on_input('move', self.move_player)
+        self.bus.on_input('choose', self.handle_dialogue_choice)
+        self.bus.on_input('potion', lambda arg: self.use_potion())
+
+        # Engine event type -> view reaction
+        event_handlers = {
+            'moved': self.on_moved,
+            'tile_cleared': self.on_tile_cleared,
+            'status': lambda ev: self.loop.defer('status', lambda: self.status_text.set(ev['text'])),
+            'level_up': self.on_level_up,
+            'victory': self.on_victory,
+            'died': self.on_died,
+            'riddle': self.open_riddle_window,
+            'riddle_result': self.on_riddle_result,
+            'mystery': self.on_mystery,
+            'mystery_result': self.on_mystery_result,
+            'dialogue_result': lambda ev: messagebox.showinfo("Town Dialogue", ev['text']),
+            'battle_start': self.open_battle_window,
+            'battle_log': lambda ev: self.log_message(ev['text']),
+            'battle_update': lambda ev: self.update_battle_labels(),
+            'battle_won': self.on_battle_won,
+            'battle_summary': self.on_battle_summary,
+        }
+        for kind, handler in event_handlers.items():
+            self.bus.subscribe(kind, handler)
+
+        master.bind('<Configure>', self.on_resize)
+
+        # Placeholder until the world is generated
+        self.canvas.create_text(self.map_pixel_size / 2, self.map_pixel_size / 2, text="Generating world...",
+                                font=('Helvetica', 12, 'italic'), fill="#34495e")
+
+        # --- CONCURRENT STARTUP ---
+        self.startup.submit('audio', self.music.start, lambda result: None)
+        self.startup.submit('player_image', self.decode_player_image, self.on_player_image_ready)
+        self.startup.submit('background', self.background.load_source, self.background.source_loaded)
+        self.initial_world = world  # kept for a retry without the save, see on_engine_failed
+        self.startup.submit('world', self.create_engine, self.on_engine_ready, world, on_error=self.on_engine_failed)
+        master.after_idle(self.startup.mark_first_frame)
+        if benchmark_startup:
+            self.startup.on_all_done = self.finish_startup_benchmark
+
+        self.loop.start()
+
+    def create_engine(self, world, load_save=True):
+        """Loads the autosave if there is one, else generates a new world (runs on a startup worker)."""
+        engine = None
+        if self.autosaver and load_save:
+            saved = load_game(self.autosaver.directory, self.seed)
+            if saved:
+                engine, generation, records = saved
+                self.autosaver.resume(engine, generation, records)
+                self.resumed = True
+        if engine is None:
+            if self.noise_map:
+                from mapgen import generate_world  # NumPy is only needed for this generator
+                world = generate_world(self.map_size, self.seed)
+            engine = GameEngine(self.map_size, self.seed, world)
+        self.planner = TravelPlanner(engine.world, engine.BATTLE_CHANCE)  # fields follow, see on_engine_ready
+        return engine
+
+    def on_engine_failed(self, error):
+        """
+        The world step raised. A save that cannot be loaded is left untouched (autosave is
+        off for this session) and a new world is started instead; if generating a new
+        world fails too, the game reports it and closes.
+        """
+        if self.autosaver and not self.resumed:
+            directory = self.autosaver.directory
+            self.autosaver.close()
+            self.autosaver = None
+            messagebox.showerror("Save Error", f"Could not load the save in {directory}:\n{error}\n\n"
+                                               "Starting a new world. Autosave is off so the old save is kept.")
+            self.startup.submit('world', self.create_engine, self.on_engine_ready, self.initial_world, False,
+                                on_error=self.on_engine_failed)
+            return
+        messagebox.showerror("Startup Error", f"Could not create the world:\n{error}")
+        self.on_closing()
+
+    def on_engine_ready(self, engine):
+        """Hooks up the generated world: map drawing, stats and key bindings."""
+        master = self.master
+        self.engine = engine
+        if self.resumed:
+            self.recorder = None  # a recording must start from a fresh session
+        if self.autosaver:
+            master.after(AUTOSAVE_MS, self.autosave)
+        if engine.map_size is None:
+            # Keep the chunks the compass loads (see update_compass) rather than regenerate them every move
+            world = engine.world
+            world.keep_radius = max(world.keep_radius, -(-COMPASS_RANGE // world.chunk_size))
+        if self.fog_enabled:
+            self.fog = FogOfWar(engine.world, SIGHT_RADIUS)
+            self.fog.update(engine.player_pos)
+        # A resumed save decides the map size, whatever --size said: fit the camera to it
+        self.map_size = engine.map_size
+        view_tiles = min(engine.map_size or 15, 15)
+        if view_tiles != self.view_tiles:
+            self.view_tiles = view_tiles
+            self.map_pixel_size = view_tiles * self.cell_size
+            self.canvas.config(width=self.map_pixel_size, height=self.map_pixel_size)
+        self.renderer = MapRenderer(self.canvas, self.engine, self.cell_size,
+                                    view_rows=self.view_tiles, view_cols=self.view_tiles,
+                                    player_image=self.player_photo_tk_icon, player_icon=self.player_icon, fog=self.fog)
+        self.draw_map()
+        # Stat and inventory labels follow the engine's observable records, once per frame
+        engine.player_stats.watch(self.on_stat_changed)
+        engine.inventory.watch(lambda key, value: self.loop.defer('inventory', self.update_inventory_display))
+        self.dirty_stat_labels.update(STAT_LABELS)
+        self.update_stats_display()
+        self.update_inventory_display()
+        self.update_compass()
+        if engine.map_size is not None:
+            # Distance fields take seconds on large maps; routes use searches until they arrive.
+            # With fog the town field is skipped: it would lead to towns the player has not seen.
+            for name, targets in standard_targets(engine.world, towns=not self.fog):
+                ticket = self.planner.begin_field()
+                self.startup.submit(f'{name}_field', self.planner.compute_field,
+                                    lambda dist, name=name, ticket=ticket: self.on_field_ready(name, dist, ticket),
+                                    targets)
+
+        # Key Bindings
+        master.bind('<Up>', lambda e: self.manual_move('up'))
+        master.bind('<Down>', lambda e: self.manual_move('down'))
+        master.bind('<Left>', lambda e: self.manual_move('left'))
+        master.bind('<Right>', lambda e: self.manual_move('right'))
+        master.bind('c', lambda e: self.start_travel('castle'))
+        master.bind('t', lambda e: self.start_travel('town'))
+        master.bind('f', lambda e: self.toggle_fast_battles())
+        if self.fast_battles:
+            self.act('fast', True)
+        self.update_route_hint()
+        master.bind('1', lambda e: self.bus.post_input('choose', 1))
+        master.bind('2', lambda e: self.bus.post_input('choose', 2))
+        master.bind('3', lambda e: self.bus.post_input('choose', 3))
+
+    def on_field_ready(self, name, dist, ticket):
+        """A background distance field is done: install it and show the route costs."""
+        self.planner.install_field(name, dist, ticket)
+        self.update_route_hint()
+
+    def finish_startup_benchmark(self):
+        """Prints the startup and import timings and closes the game (--benchmark-startup)."""
+        print(self.startup.report())
+        print(import_report())
+        self.on_closing()
+
+    # --- HELPER METHODS ---
+
+    def on_closing(self):
+        """Stops music and closes the window safely."""
+        self.loop.stop()
+        self.startup.shutdown()
+        if self.planner:
+            self.planner.cancel()
+        self.music.stop()
+        self.background.close()
+        if self.recorder:
+            self.recorder.save(self.record_path)
+        if self.battle_log_path:
+            self.combat_log.export(self.battle_log_path)
+        if self.autosaver:
+            if self.engine:
+                self.autosaver.save(self.engine)
+            self.autosaver.close()
+            self.autosaver = None
+        self.master.destroy()
+
+    def autosave(self):
+        """Queues an incremental save; the writer thread does the disk work."""
+        if not self.autosaver: return
+        self.autosaver.save(self.engine)
+        self.master.after(AUTOSAVE_MS, self.autosave)
+
+    def on_resize(self, event):
+        """Asks the background pipeline for an image matching the new window size."""
+        if event.widget == self.master:
+            self.background.request(event.width, event.height)
+
+    def set_background(self, photo):
+        """Shows a background image produced by the resize pipeline."""
+        self.background_photo = photo
+        if photo is None:
+            self.master.configure(bg="#2c3e50")
+        self.bg_label.config(image=photo or '')
+        self.bg_label.image = photo
+
+    def act(self, action, arg=None):
+        """Sends one player input to the engine (recording it when --record is on)."""
+        if self.recorder:
+            self.recorder.record(action, arg)
+        self.process_events(self.engine.step(action, arg))
+
+    def process_events(self, events):
+        """Publishes engine events on the bus, stopping after the game ends."""
+        for ev in events:
+            self.bus.publish(ev)
+            if ev['type'] in ('victory', 'died'):
+                return
+
+    def render(self):
+        """Frame render: map changes and stat labels, at most once per frame."""
+        if self.renderer:
+            self.renderer.render()
+        if self.dirty_stat_labels:
+            self.update_stats_display()
+
+    def on_moved(self, ev):
+        """Queues the player redraw, the tiles the move brought into sight and a refresh of the route hint."""
+        if self.fog:
+            for r, c in self.fog.update(ev['pos']):
+                self.renderer.mark_dirty(r, c)
+        self.loop.request_render()
+        self.loop.defer('routes', self.update_route_hint)
+        self.loop.defer('compass', self.update_compass)
+
+    def on_tile_cleared(self, ev):
+        """Queues a cleared tile for the next frame's render, lowers its route cost and notes it for the autosave."""
+        self.renderer.mark_dirty(*ev['pos'])
+        self.planner.tile_cleared(*ev['pos'])
+        if self.autosaver:
+            self.autosaver.tile_cleared(self.engine.world, *ev['pos'])
+        self.loop.request_render()
+
+    def on_stat_changed(self, key, value):
+        """player_stats watcher: marks the labels showing this field for the next frame's render."""
+        labels = LABELS_OF_STAT.get(key)
+        if labels:
+            self.dirty_stat_labels.update(labels)
+            self.loop.request_render()
+
+    def set_label_text(self, name, var, text):
+        """Pushes text to a StringVar only if it differs from what the label already shows."""
+        if self.label_texts.get(name) == text: return
+        self.label_texts[name] = text
+        var.set(text)
+
+    def setup_stats_display(self, bg, fg):
+        """Initializes the display widgets for player stats."""
+        for i, stat in enumerate(STAT_LABELS):
+            var = tk.StringVar()
+            self.stat_vars[stat] = var
+            lbl = tk.Label(self.stats_frame, textvariable=var, font=('Helvetica', 9, 'bold'), bg=bg, fg=fg)
+            lbl.grid(row=0, column=i, padx=10)
+        self.compass_var = tk.StringVar()
+        tk.Label(self.stats_frame, textvariable=self.compass_var, font=('Helvetica', 9), bg=bg, fg="#f1c40f").grid(
+            row=0, column=len(STAT_LABELS), padx=10)
+
+    def update_stats_display(self):
+        """Updates the stat labels whose fields changed since the last update."""
+        stats = self.engine.player_stats
+        for label in self.dirty_stat_labels:
+            self.set_label_text(label, self.stat_vars[label], STAT_LABELS[label][0].format(**stats.as_dict()))
+        self.dirty_stat_labels.clear()
+
+    def update_compass(self):
+        """Compass next to the stats: direction and steps to the nearest town, elder, mystery spot and the castle."""
+        engine = self.engine
+        r, c = engine.player_pos
+        world = engine.world
+        world.load_area(r - COMPASS_RANGE, c - COMPASS_RANGE, r + COMPASS_RANGE, c + COMPASS_RANGE)
+        hints = []
+        for key in COMPASS_KEYS:
+            hit = self.nearest_known(r, c, key)
+            if hit:
+                steps, pos = hit
+                hints.append(f"{engine.terrains[key].symbol}{compass_arrow(r, c, pos)}{steps}")
+        castle = world.castle_pos  # the goal is always shown, fog or not
+        hints.append(f"{engine.terrains['K'].symbol}{compass_arrow(r, c, castle)}{abs(castle[0] - r) + abs(castle[1] - c)}")
+        self.set_label_text('compass', self.compass_var, " ".join(hints))
+
+    def nearest_known(self, r, c, key):
+        """(steps, pos) of the closest POI of the key within COMPASS_RANGE; with fog only explored ones count."""
+        pois = self.engine.world.pois
+        if not self.fog:
+            return pois.nearest(r, c, key, max_steps=COMPASS_RANGE)
+        is_explored = self.fog.is_explored
+        return next(((steps, pos) for steps, pos, _ in pois.within(r, c, COMPASS_RANGE, key) if is_explored(*pos)),
+                    None)
+
+    def on_level_up(self, ev):
+        """Announces a level up."""
+        messagebox.showinfo("Level Up!",
+                            f"CONGRATULATIONS! You reached Level {ev['level']}! You feel much stronger.")
+
+    def setup_inventory_display(self, bg, fg):
+        """Sets up the inventory display and use potion button."""
+        self.potion_count_var = tk.StringVar(value="Potions: 0")
+        potion_label = tk.Label(self.inventory_frame, textvariable=self.potion_count_var,
+                                font=('Helvetica', 10, 'bold'), bg=bg, fg=fg, padx=10)
+        potion_label.pack(side=tk.LEFT, padx=(0, 15))
+        use_button = tk.Button(self.inventory_frame, text="Use Potion (+30 Health)", command=lambda: self.bus.post_input('potion'),
+                               font=('Helvetica', 10, 'bold'), bg="#27ae60", fg="white", relief='raised')
+        use_button.pack(side=tk.LEFT)
+
+    def update_inventory_display(self):
+        """Updates the potion count display."""
+        count = self.engine.inventory.potions
+        self.set_label_text('potions', self.potion_count_var, f"Potions: {count}")
+
+    def use_potion(self):
+        """Allows the player to use a health potion."""
+        if self.engine is None: return
+        self.act('potion')
+
+    def decode_player_image(self):
+        """Decodes and resizes the player portrait and icon (runs on a startup worker)."""
+        try:
+            self.assets.variant(self.player_image_path, (120, 120))
+            self.assets.variant(self.player_image_path, (self.cell_size, self.cell_size))
+            return True
+        except Exception:
+            return False
+
+    def on_player_image_ready(self, ok):
+        """Swaps the emoji placeholder for the player image once it is decoded."""
+        if not ok: return
+        self.load_player_image()
+        if self.renderer:
+            self.renderer.set_player_image(self.player_photo_tk_icon)
+
+    def load_player_image(self):
+        """Loads the player portrait (120px) and map icon (35px) through the asset cache."""
+        try:
+            self.player_photo = self.assets.photo(self.player_image_path, (120, 120))
+            self.player_photo_tk_icon = self.assets.photo(self.player_image_path, (self.cell_size, self.cell_size))
+        except FileNotFoundError:
+            self.player_photo = None;
+            self.player_photo_tk_icon = None
+        except Exception as e:
+            self.player_photo = None;
+            self.player_photo_tk_icon = None
+
+    def draw_map(self):
+        """Draws the map grid and the player once; later updates go through the renderer."""
+        self.renderer.draw_all()
+
+    def movement_blocked(self):
+        """True while movement input should be dropped instead of queued."""
+        return (self.engine is None or self.battle_window_open
+                or self.engine.in_dialogue or self.engine.in_battle or self.engine.game_over)
+
+    def move_player(self, d):
+        """Applies one (coalesced) movement intent from the bus."""
+        if self.battle_window_open: return
+        self.act('move', d)
+
+    # --- AUTO-TRAVEL ---
+
+    def manual_move(self, d):
+        """Arrow keys: cancel any auto-travel and move by hand."""
+        self.travel_moves.clear()
+        self.route_search = None
+        self.bus.post_input('move', d)
+
+    def start_travel(self, target):
+        """Starts planning the safest route to the castle or the nearest (known, with fog) town, see plan_route."""
+        if self.movement_blocked(): return
+        self.travel_moves.clear()
+        known = self.fog.is_explored if self.fog else None  # with fog, only towns already seen
+        self.route_search = (target, self.planner.plan(self.engine.player_pos, target, known))
+        self.status_text.set(f"Planning a route to the {target}...")
+
+    def plan_route(self):
+        """
+        Runs the route search for at most ROUTE_PLAN_MS (long searches on the endless map
+        take several ticks, so the game keeps drawing) and starts walking once it is done.
+        """
+        target, search = self.route_search
+        deadline = time.perf_counter() + ROUTE_PLAN_MS / 1000
+        try:
+            while time.perf_counter() < deadline:
+                next(search)
+            return
+        except StopIteration as done:
+            path = done.value
+        self.route_search = None
+        if path is None:
+            self.status_text.set(f"No route to the {target} found.")
+            return
+        if not path:
+            self.status_text.set(f"You are already at the {target}.")
+            return
+        self.travel_moves = deque(directions_along(self.engine.player_pos, path))
+        self.travel_timer = 0.0
+        self.status_text.set(f"Auto-travel to the {target}: {len(path)} steps. Press an arrow key to stop.")
+
+    def travel_tick(self, dt):
+        """Game loop system: plans routes, posts one auto-travel move every TRAVEL_STEP_MS, stops at any encounter."""
+        if self.route_search:
+            if self.movement_blocked():
+                self.route_search = None
+                return
+            self.plan_route()
+        if not self.travel_moves: return
+        if self.movement_blocked():
+            self.travel_moves.clear()
+            return
+        self.travel_timer += dt
+        if self.travel_timer * 1000 < TRAVEL_STEP_MS: return
+        self.travel_timer = 0.0
+        self.bus.post_input('move', self.travel_moves.popleft())
+
+    def update_route_hint(self):
+        """Shows the route cost to the castle and the nearest town (finite maps) and the travel keys."""
+        planner = self.planner
+        hint = f"C: travel to castle   T: travel to nearest {'known ' if self.fog else ''}town"
+        if planner.fields:
+            r, c = self.engine.player_pos
+            costs = [f"{icon} {planner.distance(name, r, c):.0f}"
+                     for name, icon in (('castle', '🏰'), ('town', '🏠')) if name in planner.fields]
+            hint = f"Route cost  {'   '.join(costs)}      {hint}"
+        self.route_text.set(hint)
+
+    def on_victory(self, ev):
+        """Shown when the player reaches the castle."""
+        messagebox.showinfo("VICTORY!", "You reached the King's Castle! You won the game.")
+        self.on_closing()
+
+    def on_died(self, ev):
+        """Handles player death and ends the game."""
+        if self.battle_window_open:
+            self.battle_win.destroy()
+        messagebox.showerror("You Died", "Your adventure has ended.");
+        self.on_closing()
+
+    # --- RIDDLES AND MYSTERY SPOTS ---
+
+    def open_riddle_window(self, ev):
+        """Shows the Elder's riddle and sends the typed answer back to the engine."""
+        try:
+            riddle_win = tk.Toplevel(self.master)
+            riddle_win.title("👴 ELDER'S RIDDLE!")
+            riddle_win.geometry("350x180")
+            riddle_win.configure(bg="#34495e")
+            riddle_win.resizable(False, False)
+            riddle_win.attributes("-topmost", True)
+
+            tk.Label(riddle_win, text="Old Man: 'Welcome, young traveler. Let's test your wits.'",
+                     font=('Helvetica', 10, 'italic'), bg="#34495e", fg="#f1c40f", wraplength=300).pack(pady=5)
+            tk.Label(riddle_win, text=ev['question'], font=('Helvetica', 12, 'bold'), bg="#34495e", fg="white",
+                     wraplength=300).pack(pady=5)
+
+            answer_var = tk.StringVar()
+            answer_entry = tk.Entry(riddle_win, textvariable=answer_var, font=('Helvetica', 10), width=30)
+            answer_entry.pack(pady=5)
+            answer_entry.focus_set()
+
+            def submit_answer():
+                player_answer = answer_var.get()
+                riddle_win.destroy()
+                self.act('riddle', player_answer)
+
+            tk.Button(riddle_win, text="Answer", command=submit_answer, bg="#27ae60", fg="white").pack(pady=10)
+
+            riddle_win.protocol("WM_DELETE_WINDOW", lambda: [riddle_win.destroy(),
+                                                             self.act('cancel')])
+
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred in the riddle event: {e}")
+            self.act('cancel')
+
+    def on_riddle_result(self, ev):
+        """Tells the player whether the riddle was solved."""
+        if ev['correct']:
+            messagebox.showinfo("Correct Answer!",
+                                f"Old Man: 'Your mind is sharp! Take your reward!'\nGain: {ev['amount']} {ev['reward_type']}!")
+        else:
+            messagebox.showerror("Wrong Answer",
+                                 f"Old Man: 'Hmm, you couldn't guess it.'\nCorrect answer: **{ev['answer']}**.")
+
+    def on_mystery(self, ev):
+        """Asks the yes/no question of a mystery spot."""
+        choice = messagebox.askyesno("Mystery Event", ev['text'])
+        self.act('mystery', choice)
+
+    def on_mystery_result(self, ev):
+        """Shows the outcome of a mystery event."""
+        if ev['success']:
+            messagebox.showinfo(ev['title'], ev['text'])
+        else:
+            messagebox.showerror(ev['title'], ev['text'])
+
+    # --- BATTLE WINDOW ---
+
+    def open_battle_window(self, ev):
+        """Builds the battle window for the enemy the engine just spawned."""
+        self.battle_window_open = True
+        enemy = ev['enemy']
+        self.combat_log.start_battle(f"{enemy.name} (Health {ev['enemy_stats'].Health})")
+        self.battle_win = tk.Toplevel(self.master)
+        self.battle_win.title("⚔️ Battle!")
+        self.battle_win.geometry("500x400")
+        self.battle_win.configure(bg="#2c3e50")
+        self.battle_win.protocol("WM_DELETE_WINDOW", self.close_battle_forced)
+        top_frame = tk.Frame(self.battle_win, bg="#34495e", pady=10)
+        top_frame.pack(fill='x')
+
+        if self.player_photo:
+            player_img_label = tk.Label(top_frame, image=self.player_photo, bg="#34495e")
+            player_img_label.image = self.player_photo
+            player_img_label.pack(side=tk.LEFT, padx=20)
+        else:
+            self.player_photo_canvas = tk.Canvas(top_frame, width=120, height=120, bg='#3498db', highlightthickness=2,
+                                                 highlightbackground="white")
+            self.player_photo_canvas.pack(side=tk.LEFT, padx=20)
+            self.player_photo_canvas.create_text(60, 60, text=self.player_icon, font=('Arial', 30))
+
+        self.player_battle_lbl = tk.Label(top_frame, text=f"You\nHealth: {self.engine.player_stats.Health}",
+                                          font=('Arial', 12, 'bold'), bg="#34495e", fg="white")
+        self.player_battle_lbl.pack(side=tk.LEFT)
+        self.enemy_photo_canvas = tk.Canvas(top_frame, width=120, height=120, bg=enemy.color,
+                                            highlightthickness=2, highlightbackground="red")
+        self.enemy_photo_canvas.pack(side=tk.RIGHT, padx=20)
+        self.enemy_photo_canvas.create_text(60, 60, text=enemy.symbol, font=('Arial', 30))
+        self.enemy_battle_lbl = tk.Label(top_frame,
+                                         text=f"{enemy.name}\nHealth: {ev['enemy_stats'].Health}",
+                                         font=('Arial', 12, 'bold'), bg="#34495e", fg="red")
+        self.enemy_battle_lbl.pack(side=tk.RIGHT)
+        self.odds_lbl = tk.Label(self.battle_win, text=self.odds_text(), font=('Arial', 10, 'italic'),
+                                 bg="#2c3e50", fg="#f1c40f")
+        self.odds_lbl.pack(fill='x')
+        log_frame = tk.Frame(self.battle_win, bg="white", padx=5, pady=5)
+        log_frame.pack(fill='both', expand=True, padx=10, pady=10)
+        self.battle_log = scrolledtext.ScrolledText(log_frame, height=10, state='disabled', font=('Courier', 10))
+        self.battle_log.pack(fill='both', expand=True)
+        btn_frame = tk.Frame(self.battle_win, bg="#2c3e50", pady=10)
+        btn_frame.pack(fill='x')
+        atk_btn = tk.Button(btn_frame, text="⚔️ ATTACK", command=self.battle_round, bg="#c0392b", fg="white",
+                            font=('Arial', 14, 'bold'), padx=20)
+        atk_btn.pack()
+
+    def log_message(self, msg):
+        """Buffers a battle log line; the game loop writes buffered lines when it has time."""
+        self.combat_log.append(msg)
+        self.loop.defer('battle_log', self.flush_battle_log)
+
+    def flush_battle_log(self):
+        """Writes all buffered lines to the battle log in one insert and trims lines past the visible cap."""
+        if not self.battle_window_open: return
+        text, trim = self.combat_log.take_pending()
+        if not text: return
+        self.battle_log.config(state='normal')
+        self.battle_log.insert(tk.END, text)
+        if trim:
+            self.battle_log.delete('1.0', f'{trim + 1}.0')
+        self.battle_log.see(tk.END)
+        self.battle_log.config(state='disabled')
+
+    def battle_round(self):
+        """Forwards an ATTACK click to the engine."""
+        self.act('attack')
+
+    def update_battle_labels(self):
+        """Refreshes the health labels in the battle window."""
+        self.player_battle_lbl.config(text=f"You\nHealth: {self.engine.player_stats.Health}")
+        self.enemy_battle_lbl.config(
+            text=f"{self.engine.current_enemy.name}\nHealth: {self.engine.enemy_stats.Health}")
+        if self.engine.in_battle:
+            self.odds_lbl.config(text=self.odds_text())
+
+    def odds_text(self):
+        """Exact odds of the current battle from its current state (memoised, so cheap every round)."""
+        odds = odds_for(self.engine)
+        return (f"Win chance {odds.win:.1%}   ~{odds.expected_rounds:.1f} rounds   "
+                f"HP loss ~{expected_loss(odds):.0f} (95%: {loss_percentile(odds, 0.95)})")
+
+    def toggle_fast_battles(self):
+        """F key: switches between battle windows and fast-forwarded battles."""
+        self.act('fast', not self.engine.fast_battles)
+        state = "ON - fights resolve instantly" if self.engine.fast_battles else "OFF"
+        self.status_text.set(f"Fast-forward battles: {state}")
+
+    def on_battle_summary(self, ev):
+        """A fast-forwarded fight: one status line instead of a battle window."""
+        if ev['won']:
+            text = (f"⚔️ {ev['enemy']} defeated in {ev['rounds']} rounds: -{ev['hp_lost']} Health, "
+                    f"+{ev['gold']} Gold, +{ev['xp']} XP.")
+        else:
+            text = f"⚔️ {ev['enemy']} defeated you after {ev['rounds']} rounds."
+        self.combat_log.record(text)
+        self.loop.defer('status', lambda: self.status_text.set(text))
+
+    def on_battle_won(self, ev):
+        """Replaces the Attack button with an exit button after victory."""
+        btn_frame = self.battle_win.winfo_children()[-1]
+        for widget in btn_frame.winfo_children():
+            widget.destroy()
+        close_btn = tk.Button(btn_frame, text="Claim Victory and Exit", command=self.close_battle_win, bg="#27ae60",
+                              fg="white", font=('Arial', 12))
+        close_btn.pack(pady=10)
+
+    def close_battle_win(self):
+        """Closes the battle window normally after victory."""
+        self.battle_window_open = False
+        self.battle_win.destroy()
+        self.update_status()
+
+    def close_battle_forced(self):
+        """Prevents closing the battle window while combat is ongoing."""
+        if self.engine.in_battle:
+            messagebox.showwarning("Hold On!", "You cannot escape the battle! You must fight to the end.")
+        else:
+            self.close_battle_win()
+
+    # --- TOWN ---
+
+    def handle_dialogue_choice(self, c):
+        """Forwards a 1/2/3 key press to the town dialogue."""
+        self.act('choose', c)
+
+    def update_status(self):
+        """Updates the status bar based on the player's current location."""
+        if self.engine.in_dialogue or self.engine.in_battle or self.battle_window_open: return
+        self.status_text.set(self.engine.location_text())
+
+
+if __name__ == '__main__':
+    import sys
+    from world import MIN_MAP_SIZE, ChunkedWorld
+
+    def option(name):
+        """Value following a command-line flag, or None."""
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else None
+
+    seed = int(option('--seed')) if option('--seed') else random.getrandbits(64)
+    map_size = int(option('--size')) if option('--size') else None
+    if map_size is not None and map_size < MIN_MAP_SIZE:
+        sys.exit(f"--size must be at least {MIN_MAP_SIZE}")
+    root = tk.Tk()
+    game = RPGMapExplorer(root, world=ChunkedWorld(seed=seed) if '--endless' in sys.argv else None,
+                          benchmark_startup='--benchmark-startup' in sys.argv,
+                          seed=seed, record_path=option('--record'), save_dir=option('--save'),
+                          map_size=map_size, noise_map='--noise' in sys.argv,
+                          battle_log_path=option('--battle-log'), fast_battles='--fast-battles' in sys.argv,
+                          fog='--no-fog' not in sys.argv)
+    root.focus_set()
+    root.mainloop()
+    if '--import-report' in sys.argv:
+        print(import_report())
+    if '--loop-stats' in sys.argv:
+        print(game.loop.stats())
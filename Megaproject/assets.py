@@ -0,0 +1,139 @@
+import hashlib
+import os
+import threading
+
+from lazy_imports import optional_import
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".asset_cache")
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024  # disk cache cap; a 1920x1080 RGB background is about 6 MB
+
+
+class AssetManager:
+    """
+    Central image loader. Each source file is decoded once; derived variants (portraits,
+    map icons, scaled backgrounds) are kept in memory and also written to an on-disk
+    cache as raw pixels, keyed by source path, mtime, target size and mode. A later
+    launch reads those bytes straight back and skips both decode and resample. The disk
+    cache is capped at max_disk_bytes: each write drops the least recently used files
+    (a hit refreshes a file's mtime) until the rest fit, so one scaled background per
+    window size cannot pile up across sessions.
+    Variant lookups are thread-safe so worker threads can use them; photo() creates Tk
+    images and must be called on the Tk thread. PIL is imported on first use; without it
+    every load raises ImportError, which callers treat like a missing image (emoji fallback).
+    Resample filters are given by name ('LANCZOS', 'NEAREST', ...).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_disk_bytes=DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.sources = {}   # absolute path -> decoded PIL image
+        self.variants = {}  # cache key -> PIL image
+        self.photos = {}    # cache key -> ImageTk.PhotoImage
+        self.lock = threading.Lock()
+
+    def cache_key(self, path, size, mode, resample):
+        """Identifies a variant; changes whenever the source file is modified."""
+        path = os.path.abspath(path)
+        return path, os.stat(path).st_mtime_ns, tuple(size), mode, resample
+
+    def disk_path(self, key):
+        """File in cache_dir holding a variant's raw pixels."""
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.raw")
+
+    @staticmethod
+    def pil(name='PIL.Image'):
+        """Returns a PIL module, importing it on first use."""
+        module = optional_import(name)
+        if module is None:
+            raise ImportError(f"{name} is not installed")
+        return module
+
+    def source(self, path):
+        """Returns the decoded source image, decoding it on first use only."""
+        path = os.path.abspath(path)
+        with self.lock:
+            img = self.sources.get(path)
+        if img is None:
+            img = self.pil().open(path)
+            img.load()
+            with self.lock:
+                img = self.sources.setdefault(path, img)
+        return img
+
+    def variant(self, path, size, mode='RGBA', resample='LANCZOS', keep=True):
+        """
+        Returns the source resized to size, from memory, then disk, then by resampling.
+        keep=False skips the memory cache, for callers that keep their own (e.g. backgrounds).
+        """
+        key = self.cache_key(path, size, mode, resample)
+        with self.lock:
+            img = self.variants.get(key)
+        if img is not None:
+            return img
+
+        img = self.read_disk(key)
+        if img is None:
+            img = self.source(path).convert(mode).resize(tuple(size), getattr(self.pil(), resample))
+            self.write_disk(key, img)
+        if not keep:
+            return img
+        with self.lock:
+            return self.variants.setdefault(key, img)
+
+    def read_disk(self, key):
+        """Loads a cached variant's raw pixels, or returns None on a miss."""
+        path = self.disk_path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # recently used: pruned last
+        except OSError:
+            return None
+        size, mode = key[2], key[3]
+        try:
+            return self.pil().frombytes(mode, size, data)
+        except ValueError:
+            return None  # truncated or foreign file; it is rewritten on the next miss
+
+    def write_disk(self, key, img):
+        """Stores a variant's raw pixels; the cache is best effort, so failures are ignored."""
+        path = self.disk_path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(img.tobytes())
+            os.replace(tmp, path)
+            self.prune_disk()
+        except OSError:
+            pass
+
+    def prune_disk(self):
+        """Deletes the least recently used cache files until the rest fit in max_disk_bytes."""
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.raw'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # removed by another writer meanwhile
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes: break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def photo(self, path, size, mode='RGBA', resample='LANCZOS'):
+        """Returns a cached Tk PhotoImage of a variant (Tk thread only)."""
+        key = self.cache_key(path, size, mode, resample)
+        photo = self.photos.get(key)
+        if photo is None:
+            img = self.variant(path, size, mode, resample)
+            photo = self.photos[key] = self.pil('PIL.ImageTk').PhotoImage(img)
+        return photo
@@ -0,0 +1,42 @@
+from lazy_imports import optional_import
+
+
+class MusicPlayer:
+    """
+    Looping background music through pygame.mixer. pygame is imported on the first
+    start(), so importing this module is free; without pygame or an audio device every
+    call is a silent no-op.
+    """
+
+    def __init__(self, music_file, volume=0.3, start_at=10.0):
+        self.music_file = music_file
+        self.volume = volume
+        self.start_at = start_at
+        self.initialized = False
+
+    def start(self):
+        """Initialises the mixer and starts the music. Returns True if music is playing."""
+        pygame = optional_import('pygame')
+        if pygame is None:
+            return False
+        try:
+            pygame.mixer.init()
+            self.initialized = True
+        except pygame.error as e:
+            print(f"Warning: Could not initialize Pygame mixer or load music. Error: {e}")
+            return False
+        try:
+            pygame.mixer.music.load(self.music_file)
+            pygame.mixer.music.play(-1, self.start_at)
+            pygame.mixer.music.set_volume(self.volume)
+        except pygame.error:
+            return False
+        return True
+
+    def stop(self):
+        """Stops the music and releases the mixer."""
+        if not self.initialized: return
+        pygame = optional_import('pygame')
+        pygame.mixer.music.stop()
+        pygame.mixer.quit()
+        self.initialized = False
@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from assets import AssetManager
+
+
+class BackgroundResizer:
+    """
+    Resize pipeline for the window background.
+    The source image is decoded once (through the AssetManager) and kept in memory.
+    Every request shows a cheap NEAREST-resized preview right away; the LANCZOS resize
+    runs on a worker thread once resize events have been quiet for debounce_ms, and is
+    swapped in when it finishes. Finished images are kept in an LRU cache keyed by size,
+    so toggling between common window sizes is instant, and the AssetManager's disk cache
+    lets the next launch at the same size skip the resample. Tk objects are only ever
+    touched on the Tk thread.
+    """
+
+    def __init__(self, master, image_path, on_ready, assets=None, debounce_ms=120, cache_size=8, poll_ms=15):
+        self.master = master
+        self.assets = assets if assets is not None else AssetManager()
+        self.image_path = image_path
+        self.on_ready = on_ready  # called with a PhotoImage (or None) whenever the background changes
+        self.debounce_ms = debounce_ms
+        self.cache_size = cache_size
+        self.poll_ms = poll_ms
+        self.cache = OrderedDict()  # (width, height) -> PhotoImage
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bg-resize")
+        self.source = None
+        self.loaded = False
+        self.current_size = None
+        self.pending_job = None
+
+    def load_source(self):
+        """
+        Decodes the source image; the background stays empty if it cannot be read.
+        Safe to run on a worker thread; call source_loaded() on the Tk thread afterwards.
+        """
+        try:
+            self.source = self.assets.source(self.image_path).convert('RGB')
+        except Exception:
+            self.source = None
+        return self.source
+
+    def source_loaded(self, source=None):
+        """Marks the source as decoded and shows the background for the latest requested size."""
+        self.loaded = True
+        size, self.current_size = self.current_size, None
+        if size is not None:
+            self.request(*size)
+
+    def request(self, width, height):
+        """Shows the background for a new window size as quickly as possible."""
+        if width <= 1 or height <= 1: return
+        size = (width, height)
+        if size == self.current_size: return
+        self.current_size = size
+        if not self.loaded: return
+        if self.source is None:
+            self.on_ready(None)
+            return
+
+        photo = self.cache.get(size)
+        if photo is not None:
+            self.cache.move_to_end(size)
+            self.cancel_pending()
+            self.on_ready(photo)
+            return
+
+        self.on_ready(self.photo_image(self.source.resize(size, self.assets.pil().NEAREST)))
+        self.cancel_pending()
+        self.pending_job = self.master.after(self.debounce_ms, self.start_resize, size)
+
+    def photo_image(self, img):
+        """Wraps a PIL image for Tk (Tk thread only)."""
+        return self.assets.pil('PIL.ImageTk').PhotoImage(img)
+
+    def cancel_pending(self):
+        """Drops a debounced resize that has not started yet."""
+        if self.pending_job is not None:
+            self.master.after_cancel(self.pending_job)
+            self.pending_job = None
+
+    def start_resize(self, size):
+        """Hands the high-quality resize to the worker thread."""
+        self.pending_job = None
+        future = self.executor.submit(self.assets.variant, self.image_path, size, 'RGB', 'LANCZOS', False)
+        self.master.after(self.poll_ms, self.poll_resize, size, future)
+
+    def poll_resize(self, size, future):
+        """Waits on the Tk thread for a worker result, then caches and (if still current) shows it."""
+        if not future.done():
+            self.master.after(self.poll_ms, self.poll_resize, size, future)
+            return
+        try:
+            img = future.result()
+        except Exception:
+            return
+        photo = self.photo_image(img)
+        self.cache[size] = photo
+        self.cache.move_to_end(size)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        if size == self.current_size:
+            self.on_ready(photo)
+
+    def close(self):
+        """Stops the worker thread without waiting for queued resizes."""
+        self.cancel_pending()
+        self.executor.shutdown(wait=False, cancel_futures=True)
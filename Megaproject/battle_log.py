@@ -0,0 +1,67 @@
+from array import array
+from collections import deque
+
+
+class BattleLog:
+    """
+    Battle log model behind the battle window's text widget.
+
+    Lines are buffered until the next flush (one widget insert per frame). The widget
+    only ever holds the last visible_lines lines: take_pending() tells the caller how
+    many old lines to trim from the top after inserting. Every line of the session is
+    also kept in a compact history (UTF-8 bytes plus an offset per line) that can be
+    read back or exported, so a long fight costs memory for its text only.
+    """
+
+    def __init__(self, visible_lines=200):
+        self.visible_lines = visible_lines
+        self.pending = deque(maxlen=visible_lines)  # older unflushed lines would be trimmed anyway
+        self.shown = 0  # lines currently in the widget
+        self.history = bytearray()
+        self.ends = array('I')  # end offset of each line in history
+
+    def start_battle(self, title):
+        """Marks a new battle in the history; the widget starts empty."""
+        self.pending.clear()
+        self.shown = 0
+        self.record(f"=== {title} ===")
+
+    def record(self, line):
+        """Adds a line to the history only."""
+        self.history += line.encode('utf-8')
+        self.ends.append(len(self.history))
+
+    def append(self, line):
+        """Adds a line to the history and queues it for the widget."""
+        self.record(line)
+        self.pending.append(line)
+
+    def take_pending(self):
+        """Returns (text to insert, number of lines to delete from the top afterwards)."""
+        lines = list(self.pending)
+        self.pending.clear()
+        if not lines:
+            return '', 0
+        self.shown += len(lines)
+        trim = max(0, self.shown - self.visible_lines)
+        self.shown -= trim
+        return "\n".join(lines) + "\n", trim
+
+    def __len__(self):
+        return len(self.ends)
+
+    def line(self, i):
+        """Line i of the history."""
+        start = self.ends[i - 1] if i > 0 else 0
+        return self.history[start:self.ends[i]].decode('utf-8')
+
+    def lines(self):
+        """Iterates over the whole history."""
+        for i in range(len(self.ends)):
+            yield self.line(i)
+
+    def export(self, path):
+        """Writes the history as a UTF-8 text file, one line per log line."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for line in self.lines():
+                f.write(line + "\n")
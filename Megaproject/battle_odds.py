@@ -0,0 +1,150 @@
+from collections import namedtuple
+from functools import lru_cache
+
+# --- ROUND RULES (mirror GameEngine.play_round) ---
+PLAYER_DAMAGE_SPREAD = (-3, 5)
+ENEMY_DAMAGE_SPREAD = (-2, 3)
+
+# win: probability the player wins; expected_rounds: mean number of player attacks;
+# hp_lost: ((hp lost, probability), ...) over all outcomes, deaths included, sorted by loss
+Odds = namedtuple('Odds', 'win expected_rounds hp_lost')
+
+
+@lru_cache(maxsize=None)
+def damage_distribution(attack, spread, crit_chance, crit_multiplier):
+    """((damage, probability), ...) of one hit: attack + uniform spread, crits scaled with int()."""
+    low, high = spread
+    share = 1 / (high - low + 1)
+    dist = {}
+    for offset in range(low, high + 1):
+        dmg = attack + offset
+        crit = int(dmg * crit_multiplier)
+        dist[dmg] = dist.get(dmg, 0.0) + share * (1 - crit_chance)
+        dist[crit] = dist.get(crit, 0.0) + share * crit_chance
+    if min(dist) <= 0:
+        raise ValueError("Every hit must deal positive damage for battles to end")
+    return tuple(sorted(dist.items()))
+
+
+@lru_cache(maxsize=4096)
+def damage_track(health, dist):
+    """
+    Hit-by-hit damage taken by one side. Returns a tuple over hit counts k = 1, 2, ...:
+    (alive, dead) where alive maps damage taken so far -> probability of having taken it
+    and still standing after k hits, and dead maps damage -> probability of falling at hit k.
+    """
+    rounds = []
+    alive = {0: 1.0}
+    while alive:
+        nxt = {}
+        dead = {}
+        for taken, p in alive.items():
+            for dmg, q in dist:
+                total = taken + dmg
+                bucket = dead if total >= health else nxt
+                bucket[total] = bucket.get(total, 0.0) + p * q
+        rounds.append((nxt, dead))
+        alive = nxt
+    return tuple(rounds)
+
+
+@lru_cache(maxsize=65536)
+def battle_odds(player_health, player_attack, enemy_health, enemy_attack, crit_chance=0.20, crit_multiplier=1.5):
+    """
+    Exact outcome of a battle from the given state, as Odds.
+
+    Each round the player hits first and the enemy hits back if it survived. The damage
+    the enemy takes and the damage the player takes are independent sequences, so the
+    DP over (player HP, enemy HP) factorises into one small DP per side: the enemy falls
+    at hit R, the player at enemy hit M, and the player wins exactly when R <= M.
+    Results are memoised, so repeated states (every round of a live battle) cost a lookup.
+    """
+    player_hits = damage_distribution(player_attack, PLAYER_DAMAGE_SPREAD, crit_chance, crit_multiplier)
+    enemy_hits = damage_distribution(enemy_attack, ENEMY_DAMAGE_SPREAD, crit_chance, crit_multiplier)
+    enemy_track = damage_track(enemy_health, player_hits)
+    player_track = damage_track(player_health, enemy_hits)
+
+    win = 0.0
+    expected_rounds = 0.0
+    hp_lost = {}
+    enemy_alive = 1.0  # P(R > k - 1) while looping over round k
+    player_alive = {0: 1.0}  # player's damage taken after k - 1 enemy hits, still standing
+    for k in range(1, len(enemy_track) + 1):
+        enemy_falls = sum(enemy_track[k - 1][1].values())
+        # Enemy falls to the player's k-th hit: the player wins with whatever they have taken so far
+        for taken, p in player_alive.items():
+            mass = p * enemy_falls
+            hp_lost[taken] = hp_lost.get(taken, 0.0) + mass
+            win += mass
+            expected_rounds += k * mass
+        enemy_alive -= enemy_falls
+        if k > len(player_track): break
+        # Enemy survives and hits back for the k-th time: the player may fall
+        alive_k, dead_k = player_track[k - 1]
+        for taken, p in dead_k.items():
+            mass = p * enemy_alive
+            hp_lost[taken] = hp_lost.get(taken, 0.0) + mass
+            expected_rounds += k * mass
+        player_alive = alive_k
+    return Odds(win, expected_rounds, tuple(sorted(hp_lost.items())))
+
+
+def odds_for(engine):
+    """Odds of the engine's current battle from its current state."""
+    stats = engine.player_stats
+    enemy = engine.enemy_stats
+    return battle_odds(stats.Health, stats.Attack, enemy.Health, enemy.Attack,
+                       engine.CRIT_CHANCE, engine.CRIT_MULTIPLIER)
+
+
+def expected_loss(odds):
+    """Mean HP lost over all outcomes."""
+    return sum(loss * p for loss, p in odds.hp_lost)
+
+
+def loss_percentile(odds, q):
+    """Smallest HP loss that is not exceeded with probability q."""
+    total = 0.0
+    for loss, p in odds.hp_lost:
+        total += p
+        if total >= q - 1e-12:
+            return loss
+    return odds.hp_lost[-1][0]
+
+
+if __name__ == '__main__':
+    import time
+
+    from game_engine import EnemyStats, GameEngine
+
+    # Check the exact odds against engine-played battles, then time cold and cached calls.
+    state = (90, 10, 42, 10)
+    odds = battle_odds(*state)
+    engine = GameEngine(seed=0)
+    fights = 200_000
+    wins = rounds = lost = 0
+    for _ in range(fights):
+        engine.player_stats.Health, engine.player_stats.Attack = state[:2]
+        engine.in_battle = True
+        engine.game_over = False
+        engine.current_enemy = engine.enemy_gallery[0]
+        engine.enemy_stats = EnemyStats(*state[2:])
+        while engine.in_battle and not engine.game_over:
+            engine.play_round()
+            rounds += 1
+        engine.events.clear()
+        wins += not engine.game_over
+        lost += state[0] - engine.player_stats.Health
+    print(f"exact:  win {odds.win:.5f}  rounds {odds.expected_rounds:.4f}  HP lost {expected_loss(odds):.3f}")
+    print(f"engine: win {wins / fights:.5f}  rounds {rounds / fights:.4f}  HP lost {lost / fights:.3f}")
+
+    battle_odds.cache_clear()
+    damage_track.cache_clear()
+    start = time.perf_counter()
+    battle_odds(290, 50, 90, 25)
+    cold = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(10_000):
+        battle_odds(290, 50, 90, 25)
+    cached = (time.perf_counter() - start) / 10_000
+    print(f"cold {cold * 1000:.2f} ms, cached {cached * 1e6:.2f} us")
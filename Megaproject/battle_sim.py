@@ -0,0 +1,138 @@
+import numpy as np
+
+from game_engine import ENEMY_GALLERY
+
+
+# --- DEFAULT RULES (mirror GameEngine.initiate_battle / battle_round / gain_xp) ---
+CRIT_CHANCE = 0.20
+CRIT_MULTIPLIER = 1.5
+ENEMY_HEALTH_RANGE = (30, 50)
+ENEMY_ATTACK_RANGE = (7, 12)
+ENEMY_HEALTH_PER_LEVEL = 4
+ENEMY_ATTACK_PER_LEVEL = 1.5
+PLAYER_DAMAGE_SPREAD = (-3, 5)
+ENEMY_DAMAGE_SPREAD = (-2, 3)
+CHUNK_SIZE = 1 << 20
+
+
+def player_stats_for_level(level):
+    """Health and Attack a player has at a level if they only levelled through gain_xp."""
+    return 90 + 20 * (level - 1), 10 + 5 * (level - 1)
+
+
+def _crit(dmg, crit_roll, crit_chance, crit_multiplier):
+    """Applies int()-style (toward zero) crit scaling where the roll succeeded."""
+    crit_dmg = np.trunc(dmg * crit_multiplier).astype(np.int64)
+    return np.where(crit_roll < crit_chance, crit_dmg, dmg)
+
+
+def _simulate_chunk(rng, n, level, player_health, player_attack, crit_chance, crit_multiplier,
+                    health_per_level, attack_per_level, max_rounds):
+    """Resolves n independent battles and returns (rounds, won, hp_lost, enemy) arrays."""
+    lvl_mod_health = int(level * health_per_level)
+    lvl_mod_attack = int(level * attack_per_level)
+    enemy = rng.integers(0, len(ENEMY_GALLERY), n, dtype=np.int8)
+    enemy_hp = rng.integers(ENEMY_HEALTH_RANGE[0] + lvl_mod_health,
+                            ENEMY_HEALTH_RANGE[1] + lvl_mod_health + 1, n)
+    enemy_atk = rng.integers(ENEMY_ATTACK_RANGE[0] + lvl_mod_attack,
+                             ENEMY_ATTACK_RANGE[1] + lvl_mod_attack + 1, n)
+    player_hp = np.full(n, player_health, dtype=np.int64)
+
+    rounds = np.zeros(n, dtype=np.int32)
+    won = np.zeros(n, dtype=bool)
+    active = np.arange(n)
+
+    for round_no in range(1, max_rounds + 1):
+        if active.size == 0:
+            break
+        m = active.size
+        rounds[active] = round_no
+
+        # Player attack
+        p_dmg = player_attack + rng.integers(PLAYER_DAMAGE_SPREAD[0], PLAYER_DAMAGE_SPREAD[1] + 1, m)
+        p_dmg = _crit(p_dmg, rng.random(m), crit_chance, crit_multiplier)
+        e_hp = enemy_hp[active] - p_dmg
+        enemy_hp[active] = e_hp
+        killed = e_hp <= 0
+        won[active[killed]] = True
+        active = active[~killed]
+        if active.size == 0:
+            break
+
+        # Enemy attack
+        m = active.size
+        e_dmg = enemy_atk[active] + rng.integers(ENEMY_DAMAGE_SPREAD[0], ENEMY_DAMAGE_SPREAD[1] + 1, m)
+        e_dmg = _crit(e_dmg, rng.random(m), crit_chance, crit_multiplier)
+        p_hp = player_hp[active] - e_dmg
+        player_hp[active] = p_hp
+        active = active[p_hp > 0]
+
+    return rounds, won, player_health - player_hp, enemy
+
+
+def simulate_battles(n, level=1, player_health=None, player_attack=None,
+                     crit_chance=CRIT_CHANCE, crit_multiplier=CRIT_MULTIPLIER,
+                     health_per_level=ENEMY_HEALTH_PER_LEVEL, attack_per_level=ENEMY_ATTACK_PER_LEVEL,
+                     seed=None, max_rounds=1000):
+    """
+    Resolves n complete battles at once with the same rules as GameEngine.battle_round.
+    player_health/player_attack default to the stats gain_xp gives at this level.
+    Returns a dict of arrays: 'rounds', 'won', 'hp_lost' (damage taken) and 'enemy'
+    (index into ENEMY_GALLERY).
+    """
+    default_health, default_attack = player_stats_for_level(level)
+    if player_health is None:
+        player_health = default_health
+    if player_attack is None:
+        player_attack = default_attack
+
+    rng = np.random.default_rng(seed)
+    parts = []
+    for start in range(0, n, CHUNK_SIZE):
+        parts.append(_simulate_chunk(rng, min(CHUNK_SIZE, n - start), level, player_health, player_attack,
+                                     crit_chance, crit_multiplier, health_per_level, attack_per_level,
+                                     max_rounds))
+    rounds, won, hp_lost, enemy = (np.concatenate(cols) for cols in zip(*parts))
+    return {'rounds': rounds, 'won': won, 'hp_lost': hp_lost, 'enemy': enemy}
+
+
+def summarize(result, by_enemy=True):
+    """Reduces simulate_battles output to win rate plus rounds / HP-lost distributions."""
+
+    def describe(mask):
+        rounds = result['rounds'][mask]
+        hp_lost = result['hp_lost'][mask]
+        return {
+            'battles': int(rounds.size),
+            'win_rate': float(result['won'][mask].mean()) if rounds.size else 0.0,
+            'rounds_mean': float(rounds.mean()) if rounds.size else 0.0,
+            'rounds_hist': np.bincount(rounds),
+            'hp_lost_mean': float(hp_lost.mean()) if rounds.size else 0.0,
+            'hp_lost_p50': float(np.percentile(hp_lost, 50)) if rounds.size else 0.0,
+            'hp_lost_p95': float(np.percentile(hp_lost, 95)) if rounds.size else 0.0,
+        }
+
+    summary = {'All': describe(slice(None))}
+    if by_enemy:
+        for i, enemy in enumerate(ENEMY_GALLERY):
+            summary[enemy.name] = describe(result['enemy'] == i)
+    return summary
+
+
+def balance_table(levels=range(1, 11), n=1_000_000, seed=0, **rules):
+    """Runs simulate_battles for each level and returns {level: summarize(...)}."""
+    return {level: summarize(simulate_battles(n, level=level, seed=seed + level, **rules)) for level in levels}
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    table = balance_table(n=1_000_000)
+    elapsed = time.perf_counter() - start
+    print(f"{'Lvl':>3} {'Enemy':<12} {'Win%':>6} {'Rounds':>6} {'HP lost':>8} {'p95':>5}")
+    for level, summary in table.items():
+        for name, row in summary.items():
+            print(f"{level:>3} {name:<12} {row['win_rate'] * 100:>6.2f} {row['rounds_mean']:>6.2f} "
+                  f"{row['hp_lost_mean']:>8.1f} {row['hp_lost_p95']:>5.0f}")
+    print(f"{len(table) * 1_000_000:,} battles in {elapsed:.1f}s")
@@ -0,0 +1,76 @@
+from collections import deque
+
+
+class EventBus:
+    """
+    Sits between raw Tk input and game actions, and carries typed game events to the
+    subsystems that care about them.
+
+    Input side: key handlers only post intents. Movement is coalesced into the latest
+    direction per frame and dropped while movement_blocked() is true (dialogue or battle
+    window open); other input (dialogue choices, potion) is queued in order. Everything
+    is applied in one flush per frame (when Tk goes idle, or from the game loop when
+    auto_flush is False), so holding a key cannot build a backlog.
+
+    Event side: subscribe(kind, callback) receives every published event dict whose
+    'type' is kind; subscribe('*', callback) receives all of them.
+    """
+
+    def __init__(self, master, movement_blocked=lambda: False, auto_flush=True):
+        self.master = master
+        self.movement_blocked = movement_blocked
+        self.auto_flush = auto_flush
+        self.input_handlers = {}  # input kind -> handler(arg)
+        self.subscribers = {}     # event type -> [callback(event)]
+        self.inputs = deque()
+        self.move_intent = None
+        self.flush_pending = False
+        self.coalesced = 0  # movement inputs replaced by a later one in the same frame
+        self.dropped = 0    # movement inputs ignored while blocked
+
+    # --- INPUT ---
+
+    def on_input(self, kind, handler):
+        """Registers the game action that applies an input kind ('move', 'choose', ...)."""
+        self.input_handlers[kind] = handler
+
+    def post_input(self, kind, arg=None):
+        """Queues raw input; cheap enough to call from every key-repeat event."""
+        if kind == 'move':
+            if self.movement_blocked():
+                self.dropped += 1
+                return
+            if self.move_intent is not None:
+                self.coalesced += 1
+            self.move_intent = arg
+        else:
+            self.inputs.append((kind, arg))
+        if self.auto_flush and not self.flush_pending:
+            self.flush_pending = True
+            self.master.after_idle(self.flush)
+
+    def flush(self):
+        """Applies queued input, then at most one movement step."""
+        self.flush_pending = False
+        while self.inputs:
+            kind, arg = self.inputs.popleft()
+            self.input_handlers[kind](arg)
+        move, self.move_intent = self.move_intent, None
+        if move is not None:
+            if self.movement_blocked():
+                self.dropped += 1
+            else:
+                self.input_handlers['move'](move)
+
+    # --- GAME EVENTS ---
+
+    def subscribe(self, kind, callback):
+        """Calls callback(event) for every published event of this type ('*' for all)."""
+        self.subscribers.setdefault(kind, []).append(callback)
+
+    def publish(self, event):
+        """Delivers one event dict to its type's subscribers, then to '*' subscribers."""
+        for callback in self.subscribers.get(event['type'], ()):
+            callback(event)
+        for callback in self.subscribers.get('*', ()):
+            callback(event)
@@ -0,0 +1,197 @@
+from game_engine import DIRECTIONS
+
+OPAQUE = frozenset('M')  # mountains block line of sight
+BLOCK = 16  # explored bits are stored per BLOCK x BLOCK tiles, only for blocks that were seen
+
+# Octant transforms for shadowcasting: (xx, xy, yx, yy)
+OCTANTS = ((1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+           (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1))
+
+
+def disk(radius):
+    """Offsets within sight radius (r^2 + r keeps the disk round at small radii)."""
+    limit = radius * radius + radius
+    return [(dr, dc) for dr in range(-radius, radius + 1) for dc in range(-radius, radius + 1)
+            if dr * dr + dc * dc <= limit]
+
+
+class FogOfWar:
+    """
+    Explored layer plus line of sight around the player; mountains block sight.
+
+    update(pos) returns only the tiles that became explored, so a view redraws just those.
+    Sight is recomputed in a window of the sight radius around the player, never over the map.
+    It is also incremental across one-tile moves: the number of mountains inside the sight
+    disk is kept up to date from the crescents of tiles that enter and leave it (precomputed
+    per direction), and while there are none the visible set is the plain disk, so the
+    tiles to reveal are exactly the entering crescent (O(radius) per move). With a mountain
+    in range, recursive shadowcasting recomputes the disk (O(radius^2)), unless every tile
+    of the disk is explored already (walking back over known ground), which is tracked the
+    same way and needs no sight at all.
+    """
+
+    def __init__(self, world, radius=4):
+        self.world = world
+        self.radius = radius
+        self.limit = radius * radius + radius
+        self.disk = disk(radius)
+        offsets = set(self.disk)
+        # Relative to the new position after a move by (dr, dc)
+        self.entering = {d: [(r, c) for r, c in self.disk if (r + dr, c + dc) not in offsets]
+                         for d, (dr, dc) in DIRECTIONS.items()}
+        self.leaving = {d: [(r - dr, c - dc) for r, c in self.disk if (r - dr, c - dc) not in offsets]
+                        for d, (dr, dc) in DIRECTIONS.items()}
+        self.explored = {}  # (block row, block col) -> packed bitset
+        self.pos = None
+        self.blockers = 0   # opaque tiles inside the sight disk around pos
+        self.unexplored = 0  # unexplored in-bounds tiles inside the sight disk around pos
+        self.open_disk = False  # last visible set was the whole disk (no blockers)
+        self.full_updates = 0
+        self.edge_updates = 0
+        self.skipped_updates = 0
+
+    # --- EXPLORED LAYER ---
+
+    def is_explored(self, r, c):
+        """True once the tile has been in sight."""
+        bits = self.explored.get((r // BLOCK, c // BLOCK))
+        if bits is None: return False
+        i = (r % BLOCK) * BLOCK + c % BLOCK
+        return bool(bits[i >> 3] >> (i & 7) & 1)
+
+    def explore(self, r, c):
+        """Sets the tile's explored bit. Returns True if it was not set before."""
+        key = (r // BLOCK, c // BLOCK)
+        bits = self.explored.get(key)
+        if bits is None:
+            bits = self.explored[key] = bytearray(BLOCK * BLOCK >> 3)
+        i = (r % BLOCK) * BLOCK + c % BLOCK
+        mask = 1 << (i & 7)
+        if bits[i >> 3] & mask: return False
+        bits[i >> 3] |= mask
+        return True
+
+    # --- SIGHT ---
+
+    def opaque(self, r, c):
+        world = self.world
+        return not world.in_bounds(r, c) or world.terrain_at(r, c) in OPAQUE
+
+    def count_blockers(self, r, c, offsets):
+        opaque = self.opaque
+        return sum(1 for dr, dc in offsets if opaque(r + dr, c + dc))
+
+    def count_unexplored(self, r, c, offsets):
+        in_bounds = self.world.in_bounds
+        is_explored = self.is_explored
+        return sum(1 for dr, dc in offsets if in_bounds(r + dr, c + dc) and not is_explored(r + dr, c + dc))
+
+    def update(self, pos):
+        """Moves the eye to pos and returns the newly explored tiles."""
+        r, c = pos
+        step = None
+        if self.pos is not None:
+            step = next((d for d, delta in DIRECTIONS.items()
+                         if (r - self.pos[0], c - self.pos[1]) == delta), None)
+            if step is None and tuple(pos) == self.pos:
+                return []
+        if step is None:
+            self.blockers = self.count_blockers(r, c, self.disk)
+            self.unexplored = self.count_unexplored(r, c, self.disk)
+        else:
+            entering, leaving = self.entering[step], self.leaving[step]
+            self.blockers += self.count_blockers(r, c, entering) - self.count_blockers(r, c, leaving)
+            self.unexplored += self.count_unexplored(r, c, entering) - self.count_unexplored(r, c, leaving)
+        self.pos = (r, c)
+
+        if self.unexplored == 0:
+            # Everything in range is known already, whatever is in sight
+            self.skipped_updates += 1
+            self.open_disk = False
+            return []
+        if self.blockers == 0 and self.open_disk and step is not None:
+            # Nothing blocks sight before or after the move: only the leading crescent is new
+            self.edge_updates += 1
+            candidates = [(r + dr, c + dc) for dr, dc in self.entering[step]]
+        else:
+            self.full_updates += 1
+            candidates = self.visible_from(r, c) if self.blockers else [(r + dr, c + dc) for dr, dc in self.disk]
+        self.open_disk = self.blockers == 0
+
+        in_bounds = self.world.in_bounds
+        explore = self.explore
+        revealed = [tile for tile in candidates if in_bounds(*tile) and explore(*tile)]
+        self.unexplored -= len(revealed)
+        return revealed
+
+    def visible_from(self, r, c):
+        """Tiles in sight of (r, c) by recursive shadowcasting over the eight octants."""
+        visible = {(r, c)}
+        for octant in OCTANTS:
+            self.cast_light(r, c, 1, 1.0, 0.0, octant, visible)
+        return visible
+
+    def cast_light(self, cr, cc, row, start, end, octant, visible):
+        """Scans one octant row by row, recursing past each run of blocking tiles."""
+        if start < end: return
+        xx, xy, yx, yy = octant
+        radius = self.radius
+        limit = self.limit
+        opaque = self.opaque
+        new_start = start
+        for j in range(row, radius + 1):
+            dx, dy = -j - 1, -j
+            blocked = False
+            while dx <= 0:
+                dx += 1
+                left_slope = (dx - 0.5) / (dy + 0.5)
+                right_slope = (dx + 0.5) / (dy - 0.5)
+                if start < right_slope: continue
+                if end > left_slope: break
+                tr, tc = cr + dx * yx + dy * yy, cc + dx * xx + dy * xy
+                if dx * dx + dy * dy <= limit:
+                    visible.add((tr, tc))
+                wall = opaque(tr, tc)
+                if blocked:
+                    if wall:
+                        new_start = right_slope
+                        continue
+                    blocked = False
+                    start = new_start
+                elif wall and j < radius:
+                    blocked = True
+                    self.cast_light(cr, cc, j + 1, start, left_slope, octant, visible)
+                    new_start = right_slope
+            if blocked: break
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    from mapgen import generate_world  # needs NumPy
+
+    # Check the incremental updates against full shadowcasting, then time moves on a large map.
+    for size in (64, 4096):
+        world = generate_world(size, seed=3)
+        fog = FogOfWar(world, radius=5)
+        reference = FogOfWar(world, radius=5)
+        rng = random.Random(0)
+        pos = [size // 2, size // 2]
+        revealed = 0
+        elapsed = 0.0
+        moves = 20_000
+        for i in range(moves):
+            d = rng.choice(tuple(DIRECTIONS))
+            dr, dc = DIRECTIONS[d]
+            if not world.in_bounds(pos[0] + dr, pos[1] + dc): continue
+            pos = [pos[0] + dr, pos[1] + dc]
+            start = time.perf_counter()
+            new = fog.update(pos)
+            elapsed += time.perf_counter() - start
+            revealed += len(new)
+            if size == 64:
+                expected = [t for t in reference.visible_from(*pos) if world.in_bounds(*t) and reference.explore(*t)]
+                assert sorted(new) == sorted(expected), (i, pos)
+        print(f"{size}x{size}: {moves} moves, {elapsed / moves * 1e6:.1f} us/move, {revealed} tiles revealed, "
+              f"{fog.edge_updates} crescent / {fog.full_updates} full / {fog.skipped_updates} skipped updates")
@@ -0,0 +1,599 @@
+import random
+from collections import namedtuple
+
+from observable import ObservableRecord
+from world import GridWorld
+
+
+# --- SHARED CONTENT TABLES ---
+# Immutable records shared by every session; per-session state lives on GameEngine.
+Terrain = namedtuple('Terrain', 'color symbol name message')
+Enemy = namedtuple('Enemy', 'name color symbol')
+Riddle = namedtuple('Riddle', 'question answer reward_type reward_amount')
+MysteryEvent = namedtuple('MysteryEvent', 'text cost_type cost_val reward_type reward_val yes_msg no_msg fail_msg',
+                          defaults=(None,))
+
+TERRAINS = {
+    'F': Terrain('#27ae60', '🌲', 'Forest', 'Dark woods.'),
+    'M': Terrain('#7f8c8d', '⛰', 'Mountain Pass', 'Rocky path. (-2 Health)'),
+    'W': Terrain('#3498db', '🌊', 'River', 'Cool waters.'),
+    'T': Terrain('#f39c12', '🏠', 'Town', 'A place to rest.'),
+    'G': Terrain('#88b04b', '🟩', 'Grassland', 'Open field.'),
+    '?': Terrain('#8e44ad', '❓', 'Mystery Spot', 'Something strange is here...'),
+    'K': Terrain('#c0392b', '🏰', "King's Castle", 'The Goal!'),
+    'E': Terrain('#5a4d45', '👴', "Elder's Hut", 'An old man sits here, waiting to test your wits.'),
+}
+
+ENEMY_GALLERY = [
+    Enemy('Goblin', '#2ecc71', '👹'),
+    Enemy('Orc Warrior', '#e74c3c', '👺'),
+    Enemy('Dark Mage', '#8e44ad', '🧙‍♂️'),
+    Enemy('Bandit', '#f39c12', '🦹'),
+]
+
+RIDDLES = [
+    Riddle('Filled by day, emptied by night. What is it?',
+           'shoe', 'MaxHealth', 15),
+    Riddle('It has teeth but cannot eat. What is it?',
+           'comb', 'Gold', 50),
+    Riddle('It runs but never walks, often murmurs, never talks, has a bed but never sleeps, has a mouth but never eats. What is it?',
+           'river', 'Attack', 3),
+    Riddle('What gets smaller the more you add to it?',
+           'hole', 'Health', 30),
+    Riddle('What has an eye but cannot see?',
+           'needle', 'MaxHealth', 10),
+    Riddle('I am tall when I am young, and I am short when I am old. What am I?',
+           'candle', 'Gold', 40),
+    Riddle('What is full of holes but still holds water?',
+           'sponge', 'Attack', 4),
+]
+
+MYSTERY_EVENTS = [
+    MysteryEvent(
+        text="You found an ancient altar. It says 'Gain power with blood'.\nWould you sacrifice some Health for Attack power?",
+        cost_type='health',
+        cost_val=20,
+        reward_type='attack',
+        reward_val=5,
+        yes_msg='You cut your hand. It hurts but you feel stronger! (-20 Health, +5 Attack)',
+        no_msg='You decide not to risk it and walk away.'),
+    MysteryEvent(
+        text='A shining pouch is on the ground, but the area looks trapped.\nDo you try to grab it?',
+        cost_type='chance_damage',
+        cost_val=25,
+        reward_type='gold',
+        reward_val=50,
+        yes_msg='Lucky! You grabbed the pouch.',
+        fail_msg='The trap sprang! Arrows hit you. (-25 Health)',
+        no_msg='You prioritize your health over quick riches.'),
+]
+
+DIRECTIONS = {'up': (-1, 0), 'down': (1, 0), 'left': (0, -1), 'right': (0, 1)}
+POTION_PRICE = 25
+POTION_HEAL = 30
+# Events of a fight that fast-forward (GameEngine.resolve_battle) folds into one 'battle_summary'
+FIGHT_EVENTS = ('battle_start', 'battle_log', 'battle_update', 'battle_won')
+
+
+# --- PER-SESSION STATE RECORDS ---
+
+class PlayerStats(ObservableRecord):
+    """The player's stats; observable so a view can refresh only the fields that changed."""
+
+    __slots__ = FIELDS = ('Health', 'MaxHealth', 'Gold', 'Level', 'Attack', 'XP', 'NextLevel')
+
+
+class Inventory(ObservableRecord):
+    """The player's items (saved and sent to clients as {'Health Potion': n})."""
+
+    __slots__ = FIELDS = ('potions',)
+    KEYS = {'potions': 'Health Potion'}
+
+
+class EnemyStats:
+    """The current enemy's stats for one battle."""
+
+    __slots__ = ('Health', 'MaxHealth', 'Attack')
+
+    def __init__(self, health, attack):
+        self.Health = self.MaxHealth = health
+        self.Attack = attack
+
+    def as_dict(self):
+        """{field: value}, as sent in events."""
+        return {'Health': self.Health, 'MaxHealth': self.MaxHealth, 'Attack': self.Attack}
+
+
+class GameEngine:
+    """
+    Headless game rules: owns the map, player stats, inventory and battle state.
+    The map is a world object (world.GridWorld by default, or a world.ChunkedWorld for
+    unbounded maps) reached through terrain_at / is_cleared / mark_cleared.
+    Every action method returns a list of event dicts ({'type': ..., ...}) that a view
+    (the Tk window, a test or a simulation script) can react to. Nothing here touches Tk.
+    """
+
+    # --- DIFFICULTY ---
+    # Class-level defaults shared by every session; assigning one on an instance (e.g. a
+    # balance sweep) overrides it for that engine only.
+    CRIT_CHANCE = 0.20
+    CRIT_MULTIPLIER = 1.5
+    BATTLE_CHANCE = 0.25  # 25% battle chance
+    XP_GROWTH = 1.5       # NextLevel multiplier per level
+    LEVEL_HEALTH = 20     # MaxHealth gained per level
+    LEVEL_ATTACK = 5      # Attack gained per level
+    POTION_PRICE = POTION_PRICE
+
+    # --- CONTENT ---
+    terrains = TERRAINS
+    enemy_gallery = ENEMY_GALLERY
+    riddles = RIDDLES
+    mystery_events = MYSTERY_EVENTS
+
+    def __init__(self, map_size=15, seed=None, world=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.events = []
+
+        # --- Game Setup ---
+        self.world = world if world is not None else GridWorld(map_size, self.rng)
+        self.map_size = self.world.map_size
+        self.player_pos = [0, 0]
+        self.game_over = False
+        self.won = False
+        self.in_dialogue = False
+        self.dialogue_kind = None  # 'town', 'riddle' or 'mystery' while in_dialogue
+        self.in_battle = False
+        self.fast_battles = False  # resolve encounters in one call (resolve_battle) instead of round by round
+
+        # Observable so a view can refresh only the fields that changed (see ObservableRecord.watch)
+        self.player_stats = PlayerStats(Health=90, MaxHealth=90, Gold=20, Level=1, Attack=10, XP=0, NextLevel=100)
+        self.inventory = Inventory(potions=0)
+
+        self.current_enemy = None
+        self.enemy_stats = None
+        self.current_riddle = None
+        self.current_mystery = None
+        self.town_has_potion = False
+
+    # --- EVENT HELPERS ---
+
+    def emit(self, kind, **data):
+        """Queues an event for the caller of the current action."""
+        data['type'] = kind
+        self.events.append(data)
+
+    def flush_events(self):
+        """Returns the queued events and starts a fresh queue."""
+        events, self.events = self.events, []
+        return events
+
+    # --- MAP ---
+
+    def location_text(self):
+        """Returns the status line for the player's current tile."""
+        r, c = self.player_pos
+        t = self.terrains[self.world.terrain_at(r, c)]
+        return f"Location: {t.name} - {t.message}"
+
+    def update_status(self):
+        """Emits the location status unless a dialogue or battle owns the status bar."""
+        if self.in_dialogue or self.in_battle: return
+        self.emit('status', text=self.location_text())
+
+    # --- ACTIONS ---
+
+    def step(self, action, arg=None):
+        """Generic entry point for scripted play: step('move', 'up'), step('attack'), ..."""
+        if action == 'move':
+            return self.move(arg)
+        if action == 'attack':
+            return self.battle_round()
+        if action == 'choose':
+            return self.handle_dialogue_choice(arg)
+        if action == 'riddle':
+            return self.answer_riddle(arg)
+        if action == 'cancel':
+            return self.cancel_riddle()
+        if action == 'mystery':
+            return self.answer_mystery(arg)
+        if action == 'potion':
+            return self.use_potion()
+        if action == 'fast':
+            self.fast_battles = bool(arg)
+            return self.flush_events()
+        raise ValueError(f"Unknown action: {action}")
+
+    def move(self, d):
+        """Moves the player and marks the previous tile as cleared."""
+        if self.game_over or self.in_dialogue or self.in_battle:
+            return self.flush_events()
+
+        world = self.world
+        old_r, old_c = self.player_pos
+        dr, dc = DIRECTIONS[d]
+        nr, nc = old_r + dr, old_c + dc
+
+        if world.in_bounds(nr, nc):
+            # Mark the previous tile as cleared if it's a common terrain (F or G)
+            if world.terrain_at(old_r, old_c) in ('F', 'G') and world.mark_cleared(old_r, old_c):
+                self.emit('tile_cleared', pos=(old_r, old_c))
+
+            self.player_pos = [nr, nc]
+            world.keep_around(nr, nc)
+            self.emit('moved', pos=(nr, nc), old_pos=(old_r, old_c))
+            self.handle_encounter(nr, nc)
+        else:
+            self.emit('status', text="You cannot move further in that direction!")
+        return self.flush_events()
+
+    def handle_encounter(self, r, c):
+        """Triggers specific events based on the terrain."""
+        key = self.world.terrain_at(r, c)
+
+        if key == 'K':
+            self.game_over = True
+            self.won = True
+            self.emit('victory')
+        elif key == 'M':
+            self.take_damage(2)
+            if not self.game_over:
+                self.emit('status', text="Mountain path is rough. -2 Health.")
+        elif key == 'T':
+            self.start_dialogue()
+        elif key == '?':
+            self.trigger_mystery_event()
+        elif key == 'E':
+            self.trigger_riddle()
+        elif key in ('F', 'G'):
+            # Check if the tile has already been cleared
+            if self.world.is_cleared(r, c):
+                self.emit('status', text=f"Location: {self.terrains[key].name} - The area is quiet and safe.")
+                return
+
+            # If not cleared, check for battle chance
+            if self.rng.random() < self.BATTLE_CHANCE:
+                self.initiate_battle()
+            else:
+                self.update_status()
+
+    # --- STATS ---
+
+    def gain_xp(self, amount):
+        """Handles XP gain and checks for level up."""
+        stats = self.player_stats
+        stats.XP += amount
+        if stats.XP >= stats.NextLevel:
+            stats.Level += 1
+            stats.XP -= stats.NextLevel
+            stats.NextLevel = int(stats.NextLevel * self.XP_GROWTH)
+            stats.MaxHealth += self.LEVEL_HEALTH
+            stats.Health = stats.MaxHealth
+            stats.Attack += self.LEVEL_ATTACK
+            self.emit('level_up', level=stats.Level)
+        self.emit('stats')
+
+    def apply_reward(self, reward_type, amount):
+        """Applies a given reward to the player's stats."""
+        stats = self.player_stats
+        if reward_type == 'Health':
+            stats.Health = min(stats.MaxHealth, stats.Health + amount)
+        elif reward_type == 'MaxHealth':
+            stats.MaxHealth += amount
+            stats.Health = min(stats.MaxHealth, stats.Health + amount)
+        elif reward_type == 'Gold':
+            stats.Gold += amount
+        elif reward_type == 'Attack':
+            stats.Attack += amount
+
+    def take_damage(self, amount):
+        """Subtracts health and checks if the player is dead."""
+        self.player_stats.Health -= amount
+        self.emit('stats')
+        if self.player_stats.Health <= 0:
+            self.die()
+
+    def die(self):
+        """Ends the game after the player's health drops to zero."""
+        if self.game_over: return
+        self.game_over = True
+        self.in_battle = False
+        self.emit('died')
+
+    def check_for_crit(self):
+        """Checks if a critical hit occurs."""
+        return self.rng.random() < self.CRIT_CHANCE
+
+    def use_potion(self):
+        """Allows the player to use a health potion."""
+        stats = self.player_stats
+        if self.inventory.potions > 0:
+            if stats.Health < stats.MaxHealth:
+                self.inventory.potions -= 1
+                stats.Health = min(stats.MaxHealth, stats.Health + POTION_HEAL)
+                self.emit('stats')
+                self.emit('inventory')
+                self.emit('status', text="You used a potion and restored 30 Health!")
+            else:
+                self.emit('status', text="You are already at full health!")
+        else:
+            self.emit('status', text="You have no health potions left!")
+        return self.flush_events()
+
+    # --- RIDDLES AND MYSTERY SPOTS ---
+
+    def trigger_riddle(self):
+        """Starts a riddle encounter with the Elder."""
+        self.in_dialogue = True
+        self.dialogue_kind = 'riddle'
+        self.current_riddle = self.rng.choice(self.riddles)
+        self.emit('riddle', question=self.current_riddle.question)
+
+    def answer_riddle(self, answer):
+        """Checks the player's answer to the pending riddle and pays out the reward."""
+        if self.dialogue_kind != 'riddle':
+            return self.flush_events()
+        riddle = self.current_riddle
+        self.current_riddle = None
+        if answer is not None and answer.strip().lower() == riddle.answer.lower():
+            self.apply_reward(riddle.reward_type, riddle.reward_amount)
+            self.emit('riddle_result', correct=True, answer=riddle.answer,
+                      reward_type=riddle.reward_type, amount=riddle.reward_amount)
+        else:
+            self.emit('riddle_result', correct=False, answer=riddle.answer)
+        self.in_dialogue = False
+        self.dialogue_kind = None
+        self.emit('stats')
+        self.update_status()
+        return self.flush_events()
+
+    def cancel_riddle(self):
+        """Walks away from the Elder without answering."""
+        if self.dialogue_kind != 'riddle':
+            return self.flush_events()
+        self.current_riddle = None
+        self.in_dialogue = False
+        self.dialogue_kind = None
+        self.update_status()
+        return self.flush_events()
+
+    def trigger_mystery_event(self):
+        """Presents a random risk/reward event and waits for a yes/no answer."""
+        self.in_dialogue = True
+        self.dialogue_kind = 'mystery'
+        self.current_mystery = self.rng.choice(self.mystery_events)
+        self.emit('mystery', text=self.current_mystery.text)
+
+    def answer_mystery(self, choice):
+        """Resolves the pending mystery event with the player's yes/no answer."""
+        if self.dialogue_kind != 'mystery':
+            return self.flush_events()
+        event = self.current_mystery
+        self.current_mystery = None
+        self.in_dialogue = False
+        self.dialogue_kind = None
+
+        if choice:
+            if event.cost_type == "health":
+                self.take_damage(event.cost_val)
+                self.player_stats.Attack += event.reward_val
+                self.emit('mystery_result', success=True, title="Result", text=event.yes_msg)
+            elif event.cost_type == "chance_damage":
+                if self.rng.random() > 0.55:
+                    self.player_stats.Gold += event.reward_val
+                    self.emit('mystery_result', success=True, title="Success!",
+                              text=f"{event.yes_msg} (+{event.reward_val} Gold)")
+                else:
+                    self.take_damage(event.cost_val)
+                    self.emit('mystery_result', success=False, title="Failure!", text=event.fail_msg)
+        else:
+            self.emit('status', text=event.no_msg)
+
+        self.emit('stats')
+        return self.flush_events()
+
+    # --- BATTLE ---
+
+    def initiate_battle(self):
+        """Starts a new battle encounter."""
+        rng = self.rng
+        self.in_battle = True
+        self.current_enemy = rng.choice(self.enemy_gallery)
+        lvl_mod_health = self.player_stats.Level * 4
+        lvl_mod_attack = self.player_stats.Level * 1.5
+        self.enemy_stats = EnemyStats(
+            health=rng.randint(30 + int(lvl_mod_health), 50 + int(lvl_mod_health)),
+            attack=rng.randint(7 + int(lvl_mod_attack), 12 + int(lvl_mod_attack)))
+        if self.fast_battles:
+            self.resolve_battle()
+            return
+        self.emit('battle_start', enemy=self.current_enemy, enemy_stats=self.enemy_stats)
+        self.emit('battle_log', text=f"A fierce {self.current_enemy.name} appeared!")
+
+    def battle_round(self):
+        """Executes one round of combat (player attack, enemy attack, checks)."""
+        if not self.in_battle:
+            if self.enemy_stats is not None and self.enemy_stats.Health <= 0:
+                self.emit('battle_log', text="> The enemy is already defeated. Claim your victory!")
+            return self.flush_events()
+        self.play_round()
+        return self.flush_events()
+
+    def resolve_battle(self):
+        """
+        Fast-forward: fights the current battle to the end with the normal round rules
+        (same rng draws as clicking Attack each round). The per-round battle events are
+        replaced by one 'battle_summary', followed by the stats, level-up and death events.
+        """
+        mark = len(self.events)
+        start_health = self.player_stats.Health
+        rounds = 0
+        while self.in_battle and not self.game_over:
+            self.play_round()
+            rounds += 1
+        fight = self.events[mark:]
+        del self.events[mark:]
+        loot = {'gold': 0, 'xp': 0}
+        for ev in fight:
+            if ev['type'] == 'battle_won':
+                loot = {'gold': ev['gold'], 'xp': ev['xp']}
+        self.emit('battle_summary', enemy=self.current_enemy.name, rounds=rounds, won=not self.game_over,
+                  hp_lost=start_health - self.player_stats.Health, **loot)
+        self.events.extend(ev for ev in fight if ev['type'] not in FIGHT_EVENTS)
+
+    def play_round(self):
+        """One round of combat; events are left queued for the caller to flush."""
+        rng = self.rng
+        stats = self.player_stats
+        enemy = self.enemy_stats
+        name = self.current_enemy.name
+
+        # Player Attack
+        is_player_crit = self.check_for_crit()
+        p_dmg = stats.Attack + rng.randint(-3, 5)
+        if is_player_crit:
+            p_dmg = int(p_dmg * self.CRIT_MULTIPLIER)
+            self.emit('battle_log', text="⭐ CRITICAL HIT! ⭐")
+
+        enemy.Health -= p_dmg
+        self.emit('battle_log', text=f"> You dealt {p_dmg} damage to {name}!")
+
+        # Enemy Check (Defeat)
+        if enemy.Health <= 0:
+            enemy.Health = 0
+            self.in_battle = False
+            self.emit('battle_update')
+            self.emit('battle_log', text=f"--- {name} DEFEATED! ---")
+
+            gold = rng.randint(10, 25) * stats.Level
+            xp = rng.randint(30, 50)
+            stats.Gold += gold
+            self.emit('battle_log', text=f"Loot: {gold} Gold, {xp} XP.")
+            self.gain_xp(xp)
+            self.emit('battle_won', gold=gold, xp=xp)
+            return
+
+        # Enemy Attack
+        is_enemy_crit = self.check_for_crit()
+        e_dmg = enemy.Attack + rng.randint(-2, 3)
+        if is_enemy_crit:
+            e_dmg = int(e_dmg * self.CRIT_MULTIPLIER)
+            self.emit('battle_log', text="💥 ENEMY CRITICAL HIT! 💥")
+
+        stats.Health -= e_dmg
+        self.emit('battle_log', text=f"> The enemy retaliated for {e_dmg} damage!")
+        self.emit('battle_update')
+        self.emit('stats')
+
+        # Player Check (Defeat)
+        if stats.Health <= 0:
+            self.die()
+
+    # --- TOWN ---
+
+    def start_dialogue(self):
+        """Initiates the town/tavern dialogue."""
+        if self.in_dialogue: return
+        self.in_dialogue = True
+        self.dialogue_kind = 'town'
+        self.town_has_potion = self.rng.choice([True, False])
+        d_text = "TAVERN KEEPER: 'Welcome, traveler. What do you need?'\n\n"
+        d_text += "1) Rest (Free, Full Health)\n"
+        if self.town_has_potion:
+            d_text += f"2) Buy Potion ({self.POTION_PRICE} Gold)\n"
+        else:
+            d_text += "2) Buy Potion (SOLD OUT)\n"
+        d_text += "3) Exit Town"
+        self.emit('status', text=d_text)
+
+    def handle_dialogue_choice(self, c):
+        """Handles the player's choice in town dialogue."""
+        if self.dialogue_kind != 'town':
+            return self.flush_events()
+        stats = self.player_stats
+        if c == 1:
+            stats.Health = stats.MaxHealth
+            msg = "Tavern Keeper: 'Sleep well.' (Health Restored)"
+        elif c == 2:
+            if not self.town_has_potion:
+                msg = "Tavern Keeper: 'Sorry, the last caravan hasn't arrived.' (SOLD OUT)"
+            elif stats.Gold >= self.POTION_PRICE:
+                stats.Gold -= self.POTION_PRICE
+                self.inventory.potions += 1
+                msg = f"Tavern Keeper: 'Here is your potion.' (-{self.POTION_PRICE} Gold, +1 Potion)"
+            else:
+                msg = "Tavern Keeper: 'You don't have enough coin, friend.'"
+        elif c == 3:
+            msg = "Tavern Keeper: 'Safe travels!'"
+        else:
+            return self.flush_events()
+        self.in_dialogue = False
+        self.dialogue_kind = None
+        self.emit('dialogue_result', text=msg)
+        self.emit('stats')
+        self.emit('inventory')
+        self.update_status()
+        return self.flush_events()
+
+
+def autoplay_action(engine, rng):
+    """Scripted policy for headless runs: returns the next (action, arg) for the engine."""
+    if engine.in_battle:
+        return 'attack', None
+    if engine.dialogue_kind == 'town':
+        stats = engine.player_stats
+        if stats.Health < stats.MaxHealth:
+            return 'choose', 1
+        if engine.town_has_potion and stats.Gold >= engine.POTION_PRICE:
+            return 'choose', 2
+        return 'choose', 3
+    if engine.dialogue_kind == 'riddle':
+        return 'riddle', engine.current_riddle.answer if rng.random() < 0.5 else ''
+    if engine.dialogue_kind == 'mystery':
+        return 'mystery', rng.random() < 0.5
+    stats = engine.player_stats
+    if stats.Health < stats.MaxHealth // 3 and engine.inventory.potions > 0:
+        return 'potion', None
+    return 'move', rng.choice(('down', 'right', 'down', 'right', 'up', 'left'))
+
+
+if __name__ == '__main__':
+    import time
+
+    # Headless throughput check: how many scripted actions per second the rules sustain.
+    policy_rng = random.Random(0)
+    engine = GameEngine(seed=0)
+    actions = 0
+    games = 1
+    start = time.perf_counter()
+    while actions < 300_000:
+        if engine.game_over:
+            engine = GameEngine(seed=games)
+            games += 1
+        engine.step(*autoplay_action(engine, policy_rng))
+        actions += 1
+    elapsed = time.perf_counter() - start
+    print(f"{actions} actions in {elapsed:.2f}s ({actions / elapsed:,.0f}/s) across {games} games")
+
+    # Fast-forward battles must not change the game: same seed and policy, same end state.
+    def play(seed, fast, max_actions=20_000):
+        engine = GameEngine(seed=seed)
+        engine.step('fast', fast)
+        policy_rng = random.Random(seed)
+        battles = 0
+        for _ in range(max_actions):
+            if engine.game_over: break
+            action = autoplay_action(engine, policy_rng)
+            events = engine.step(*action)
+            battles += sum(1 for ev in events if ev['type'] in ('battle_start', 'battle_summary'))
+        state = (tuple(engine.player_pos), engine.player_stats.as_dict(), engine.inventory.as_dict(),
+                 engine.game_over, engine.won)
+        return state, battles
+
+    battles = 0
+    for seed in range(300):
+        normal, fights = play(seed, False)
+        fast, fast_fights = play(seed, True)
+        assert normal == fast and fights == fast_fights, (seed, normal, fast)
+        battles += fights
+    print(f"300 seeds: fast-forward and round-by-round battles end identically ({battles} battles)")
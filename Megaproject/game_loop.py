@@ -0,0 +1,132 @@
+import time
+from collections import OrderedDict, deque
+
+
+class GameLoop:
+    """
+    Fixed-timestep scheduler driven by master.after.
+
+    Each frame runs the registered systems in fixed dt steps to catch up with real time
+    (at most max_catchup steps, so a stall cannot snowball), renders at most once and
+    only if something requested it, and then spends whatever is left of the frame
+    budget on low-priority deferred work (status text, labels, log flushing). Deferred
+    work that keeps getting squeezed out runs anyway after max_defer_frames frames.
+    Tick durations are kept so frame-budget misses can be inspected via stats().
+    """
+
+    def __init__(self, master, tick_rate=60, frame_budget_ms=None, max_catchup=5, max_defer_frames=10):
+        self.master = master
+        self.dt = 1.0 / tick_rate
+        self.frame_budget = (frame_budget_ms / 1000) if frame_budget_ms else self.dt * 0.75
+        self.max_catchup = max_catchup
+        self.max_defer_frames = max_defer_frames
+        self.systems = []      # callback(dt) run every fixed tick
+        self.renderers = []    # callback() run at most once per frame
+        self.deferred = OrderedDict()  # key -> (callback, frame it was deferred in)
+        self.render_requested = False
+        self.running = False
+        self.in_frame = False
+        self.job = None
+        self.last_time = None
+        self.accumulator = 0.0
+        self.frame_no = 0
+        self.tick_durations = deque(maxlen=600)  # seconds spent per frame, most recent last
+        self.missed_frames = 0
+        self.dropped_ticks = 0
+
+    def add_system(self, callback):
+        """Registers callback(dt) to run once per fixed simulation tick."""
+        self.systems.append(callback)
+
+    def add_renderer(self, callback):
+        """Registers callback() to run when a render was requested, at most once per frame."""
+        self.renderers.append(callback)
+
+    def request_render(self):
+        """Marks the frame as needing a render."""
+        self.render_requested = True
+
+    def defer(self, key, callback):
+        """Queues low-priority work; a later defer with the same key replaces the earlier one."""
+        old = self.deferred.pop(key, None)
+        self.deferred[key] = (callback, old[1] if old else self.frame_no)
+
+    def start(self):
+        """Starts ticking."""
+        if self.running: return
+        self.running = True
+        self.last_time = time.perf_counter()
+        self.job = self.master.after(int(self.dt * 1000), self.frame)
+
+    def stop(self):
+        """Stops ticking; pending deferred work is dropped."""
+        self.running = False
+        self.deferred.clear()
+        self.render_requested = False
+        if self.job is not None:
+            self.master.after_cancel(self.job)
+            self.job = None
+
+    def frame(self):
+        """One frame: fixed-step updates, one render, then deferred work within the budget."""
+        self.job = None
+        if not self.running: return
+        if self.in_frame:  # re-entered from a modal dialog's nested event loop
+            self.job = self.master.after(int(self.dt * 1000), self.frame)
+            return
+        self.in_frame = True
+        start = time.perf_counter()
+        try:
+            self.frame_no += 1
+            self.accumulator += start - self.last_time
+            self.last_time = start
+            steps = 0
+            while self.accumulator >= self.dt and steps < self.max_catchup:
+                for system in self.systems:
+                    system(self.dt)
+                    if not self.running: return  # a system ended the game (and maybe destroyed the window)
+                self.accumulator -= self.dt
+                steps += 1
+            if self.accumulator >= self.dt:
+                self.dropped_ticks += int(self.accumulator / self.dt)
+                self.accumulator %= self.dt
+
+            if self.render_requested:
+                self.render_requested = False
+                for render in self.renderers:
+                    render()
+                    if not self.running: return
+
+            while self.deferred:
+                key, (callback, since) = next(iter(self.deferred.items()))
+                overdue = self.frame_no - since >= self.max_defer_frames
+                if not overdue and time.perf_counter() - start >= self.frame_budget:
+                    break
+                del self.deferred[key]
+                callback()
+                if not self.running: return
+        finally:
+            self.in_frame = False
+
+        duration = time.perf_counter() - start
+        self.tick_durations.append(duration)
+        if duration > self.dt:
+            self.missed_frames += 1
+        if self.running:
+            delay = max(1, int((self.dt - self.accumulator - duration) * 1000))
+            self.job = self.master.after(delay, self.frame)
+
+    def stats(self):
+        """Frame timing summary in milliseconds, plus budget misses and backlog size."""
+        durations = sorted(self.tick_durations)
+        if not durations:
+            return {'frames': 0}
+        return {
+            'frames': self.frame_no,
+            'mean_ms': sum(durations) / len(durations) * 1000,
+            'p95_ms': durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+            'max_ms': durations[-1] * 1000,
+            'missed_frames': self.missed_frames,
+            'dropped_ticks': self.dropped_ticks,
+            'deferred_backlog': len(self.deferred),
+        }
@@ -0,0 +1,45 @@
+import importlib
+import os
+import sys
+import time
+
+
+# module name -> seconds spent importing it on first use (recorded only if it was not loaded yet)
+IMPORT_TIMES = {}
+_modules = {}  # module name -> module, or None if it is not installed
+
+
+def optional_import(name):
+    """
+    Imports an optional dependency (pygame, PIL.Image, ...) the first time it is needed.
+    Returns None, and keeps returning None, if the module is not installed, so callers
+    can fall back to a no-op path. The time each first import takes is recorded.
+    """
+    if name in _modules:
+        return _modules[name]
+    if name.split('.')[0] == 'pygame':
+        os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')  # no banner on stdout
+    already_loaded = name in sys.modules
+    start = time.perf_counter()
+    try:
+        module = importlib.import_module(name)
+    except ImportError:
+        module = None
+    if not already_loaded:
+        IMPORT_TIMES[name] = time.perf_counter() - start
+    _modules[name] = module
+    return module
+
+
+def import_report():
+    """Lists the optional modules loaded so far, slowest first (like -X importtime, but only ours)."""
+    lines = ["Optional imports (ms):"]
+    if not _modules:
+        lines.append("  none loaded")
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]):
+        state = "" if _modules.get(name) is not None else "  (missing)"
+        lines.append(f"  {name:<14} {seconds * 1000:8.1f}{state}")
+    for name, module in _modules.items():
+        if name not in IMPORT_TIMES:
+            lines.append(f"  {name:<14} {'preloaded' if module is not None else 'missing':>8}")
+    return "\n".join(lines)
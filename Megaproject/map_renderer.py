@@ -0,0 +1,179 @@
+TILE_OUTLINE = "#bdc3c7"
+CLEARED_OUTLINE = "#f1c40f"
+TILE_FONT = ('Segoe UI Emoji', 14)
+PLAYER_FONT = ('Segoe UI Emoji', 18)
+FOG_STYLE = ("#1c2833", "", "#17202a")  # (fill, symbol, outline) of a tile never seen
+
+
+class MapRenderer:
+    """
+    Camera-based incremental renderer for the engine's map.
+    Only a view_rows x view_cols window (plus a margin of tiles on each side) is ever
+    drawn, using a fixed pool of rectangle + emoji text items. World tile (r, c) always
+    lives in pool slot (r % pool_rows, c % pool_cols), so when the camera scrolls only the
+    slots of the rows/columns that came into range are moved and restyled; the canvas
+    itself is scrolled by moving its scrollregion. Draw cost depends on the window size,
+    not on the world size.
+    With a fog (fog.FogOfWar), tiles that were never in sight are drawn as FOG_STYLE; the
+    caller marks the tiles each move reveals dirty, so only those are restyled.
+    """
+
+    def __init__(self, canvas, engine, cell_size, view_rows=15, view_cols=15, margin=1,
+                 player_image=None, player_icon='🤠', fog=None):
+        self.canvas = canvas
+        self.fog = fog
+        self.engine = engine
+        self.cell_size = cell_size
+        self.player_image = player_image
+        self.player_icon = player_icon
+        self.margin = margin
+        self.view_rows = view_rows
+        self.view_cols = view_cols
+        self.pool_rows = view_rows + 2 * margin
+        self.pool_cols = view_cols + 2 * margin
+        self.slots = {}  # (slot row, slot col) -> [rectangle id, text id, tile shown, style drawn]
+        self.dirty = set()
+        self.player_item = None
+        self.top = None   # world row / col at the top-left corner of the visible window
+        self.left = None
+
+    def tile_style(self, r, c):
+        """Returns (fill, symbol, outline) for a tile from the engine state."""
+        if self.fog is not None and not self.fog.is_explored(r, c):
+            return FOG_STYLE
+        world = self.engine.world
+        t = self.engine.terrains[world.terrain_at(r, c)]
+        outline = CLEARED_OUTLINE if world.is_cleared(r, c) else TILE_OUTLINE
+        return t.color, t.symbol, outline
+
+    def tile_center(self, r, c):
+        """Canvas coordinates of the middle of a tile."""
+        return c * self.cell_size + self.cell_size / 2, r * self.cell_size + self.cell_size / 2
+
+    def draw_all(self):
+        """Creates the item pool and the player item, then points the camera at the player."""
+        canvas = self.canvas
+        canvas.delete("all")
+        self.slots.clear()
+        self.dirty.clear()
+        for sr in range(self.pool_rows):
+            for sc in range(self.pool_cols):
+                rect = canvas.create_rectangle(0, 0, 0, 0, fill="", outline=TILE_OUTLINE, state='hidden')
+                text = canvas.create_text(0, 0, text="", font=TILE_FONT, fill="black", state='hidden')
+                self.slots[(sr, sc)] = [rect, text, None, None]
+
+        x, y = self.tile_center(*self.engine.player_pos)
+        if self.player_image:
+            self.player_item = canvas.create_image(x, y, image=self.player_image, tags="player")
+        else:
+            self.player_item = canvas.create_text(x, y, text=self.player_icon, font=PLAYER_FONT, tags="player")
+
+        self.top = self.left = None
+        self.follow_player()
+
+    def camera_origin(self):
+        """Top-left world tile of a window centred on the player, clamped to finite maps."""
+        r, c = self.engine.player_pos
+        top, left = r - self.view_rows // 2, c - self.view_cols // 2
+        size = self.engine.map_size
+        if size is not None:
+            top = max(0, min(top, size - self.view_rows))
+            left = max(0, min(left, size - self.view_cols))
+        return top, left
+
+    def follow_player(self):
+        """Scrolls the camera if the player's position moved the window."""
+        top, left = self.camera_origin()
+        if (top, left) != (self.top, self.left):
+            self.scroll_to(top, left)
+
+    def scroll_to(self, top, left):
+        """Moves the window so (top, left) is the top-left visible tile, recycling edge slots."""
+        m = self.margin
+        rows = range(top - m, top - m + self.pool_rows)
+        cols = range(left - m, left - m + self.pool_cols)
+        if self.top is None or abs(top - self.top) >= self.pool_rows or abs(left - self.left) >= self.pool_cols:
+            entering = [(r, c) for r in rows for c in cols]
+        else:
+            old_rows = range(self.top - m, self.top - m + self.pool_rows)
+            old_cols = range(self.left - m, self.left - m + self.pool_cols)
+            new_rows = [r for r in rows if r not in old_rows]
+            new_cols = [c for c in cols if c not in old_cols]
+            entering = [(r, c) for r in new_rows for c in cols]
+            entering += [(r, c) for r in rows if r not in new_rows for c in new_cols]
+        for r, c in entering:
+            self.assign_slot(r, c)
+
+        self.top, self.left = top, left
+        size = self.cell_size
+        x0, y0 = left * size, top * size
+        self.canvas.configure(scrollregion=(x0, y0, x0 + self.view_cols * size, y0 + self.view_rows * size))
+        self.canvas.xview_moveto(0)
+        self.canvas.yview_moveto(0)
+
+    def assign_slot(self, r, c):
+        """Moves the pool slot owned by tile (r, c) onto that tile and restyles it."""
+        canvas = self.canvas
+        slot = self.slots[(r % self.pool_rows, c % self.pool_cols)]
+        rect, text = slot[0], slot[1]
+        if not self.engine.world.in_bounds(r, c):
+            if slot[2] is not None:
+                canvas.itemconfigure(rect, state='hidden')
+                canvas.itemconfigure(text, state='hidden')
+            slot[2] = slot[3] = None
+            return
+        size = self.cell_size
+        x1, y1 = c * size, r * size
+        canvas.coords(rect, x1, y1, x1 + size, y1 + size)
+        canvas.coords(text, x1 + size / 2, y1 + size / 2)
+        if slot[2] is None:
+            canvas.itemconfigure(rect, state='normal')
+            canvas.itemconfigure(text, state='normal')
+        slot[2] = (r, c)
+        self.restyle_slot(slot)
+
+    def restyle_slot(self, slot):
+        """Pushes fill/outline/symbol to the slot's items only where they changed."""
+        style = self.tile_style(*slot[2])
+        old = slot[3]
+        if style == old: return
+        if old is None or style[0] != old[0] or style[2] != old[2]:
+            self.canvas.itemconfigure(slot[0], fill=style[0], outline=style[2])
+        if old is None or style[1] != old[1]:
+            self.canvas.itemconfigure(slot[1], text=style[1])
+        slot[3] = style
+
+    def mark_dirty(self, r, c):
+        """Schedules a tile for reconfiguration on the next redraw_dirty()."""
+        self.dirty.add((r, c))
+
+    def redraw_dirty(self):
+        """Restyles dirty tiles that are currently on screen; off-screen ones restyle on entry."""
+        if not self.dirty: return
+        for pos in self.dirty:
+            slot = self.slots.get((pos[0] % self.pool_rows, pos[1] % self.pool_cols))
+            if slot is not None and slot[2] == pos:
+                self.restyle_slot(slot)
+        self.dirty.clear()
+
+    def set_player_image(self, image):
+        """Replaces the player item, e.g. when the real icon finishes loading."""
+        self.player_image = image
+        if self.player_item is None: return
+        x, y = self.tile_center(*self.engine.player_pos)
+        self.canvas.delete(self.player_item)
+        self.player_item = self.canvas.create_image(x, y, image=image, tags="player")
+
+    def move_player(self):
+        """Moves the existing player item and lets the camera follow it."""
+        if self.player_item is None:
+            self.draw_all()
+            return
+        self.canvas.coords(self.player_item, *self.tile_center(*self.engine.player_pos))
+        self.follow_player()
+
+    def render(self):
+        """Brings the canvas up to date with the engine once per frame."""
+        if self.player_item is None: return
+        self.move_player()
+        self.redraw_dirty()
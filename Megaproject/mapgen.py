@@ -0,0 +1,188 @@
+import numpy as np
+
+from world import CODE_OF, GridWorld, TileGrid
+
+# Biome shares of the ordinary tiles, matching the classic generator's odds
+# (TERRAIN_KEYS: forest and grassland 1/3 each, mountains and rivers 1/6 each).
+MOUNTAIN_SHARE = 1 / 6
+WATER_SHARE = 1 / 6
+# The classic 15x15 map's points of interest, scaled by map area.
+CLASSIC_AREA = 15 * 15
+TOWNS = (3, 6)
+MYSTERY_SPOTS = 4
+ELDERS = (2, 4)
+SAFE_TOWN_RADIUS = 12  # a town is always placed within this many steps of the start
+
+
+def value_noise(rng, size, scale):
+    """size x size smooth noise: random values on a grid every `scale` tiles, smoothstep-interpolated."""
+    cells = -(-size // scale) + 1
+    grid = rng.random((cells, cells), dtype=np.float32)
+    f = np.arange(scale, dtype=np.float32) / scale
+    f = f * f * (3 - 2 * f)
+    # Pure broadcasting, no gathers: interpolate between grid rows, then between grid columns
+    rows = (grid[:-1, None, :] * (1 - f)[:, None] + grid[1:, None, :] * f[:, None]).reshape(-1, cells)
+    out = rows[:, :-1, None] * (1 - f) + rows[:, 1:, None] * f
+    return out.reshape(rows.shape[0], -1)[:size, :size]
+
+
+def fractal_noise(rng, size, scale, octaves=4):
+    """Sum of value-noise octaves, each half the scale and half the weight of the previous one."""
+    total = np.zeros((size, size), dtype=np.float32)
+    weight = 1.0
+    for _ in range(octaves):
+        total += value_noise(rng, size, max(scale, 1)) * weight
+        scale //= 2
+        weight /= 2
+        if scale < 1: break
+    return total
+
+
+def threshold(values, share, top):
+    """Value above (top) or below which `share` of the tiles lie, estimated on a sample."""
+    sample = values.ravel()[::7]
+    return np.quantile(sample, 1 - share if top else share)
+
+
+def biome_codes(rng, size):
+    """Terrain codes from two noise fields: elevation picks mountains and rivers, moisture forest vs grass."""
+    scale = int(min(64, max(4, size // 4)))
+    elevation = fractal_noise(rng, size, scale)
+    moisture = fractal_noise(rng, size, scale)
+    codes = np.where(moisture >= np.median(moisture.ravel()[::7]), CODE_OF['F'], CODE_OF['G']).astype(np.uint8)
+    codes[elevation >= threshold(elevation, MOUNTAIN_SHARE, top=True)] = CODE_OF['M']
+    codes[elevation <= threshold(elevation, WATER_SHARE, top=False)] = CODE_OF['W']
+    return codes
+
+
+def run_components(passable):
+    """
+    Labels 4-connected regions of passable tiles. Each row is split into horizontal runs
+    (vectorised), runs in neighbouring rows that overlap are joined with union-find, and
+    the run labels are expanded back to tiles. Returns a flat array of component ids
+    (-1 for blocked tiles).
+    """
+    rows, cols = passable.shape
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = passable
+    edges = np.diff(padded, axis=1)
+    start_r, start_c = np.nonzero(edges == 1)   # runs in row-major order
+    end_r, end_c = np.nonzero(edges == -1)      # exclusive ends, same order
+    width = cols + 1
+    start_keys = start_r * width + start_c
+    end_keys = end_r * width + end_c
+
+    # Runs of row r overlapping run b of row r + 1 form one contiguous index range
+    below = start_r > 0
+    b = np.flatnonzero(below)
+    above_row = start_r[b] - 1
+    lo = np.searchsorted(end_keys, above_row * width + start_c[b], side='right')
+    hi = np.searchsorted(start_keys, above_row * width + end_c[b], side='left')
+    counts = np.maximum(hi - lo, 0)
+    pair_b = np.repeat(b, counts)
+    pair_a = np.repeat(lo, counts) + (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts))
+
+    parent = list(range(len(start_keys)))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, bb in zip(pair_a.tolist(), pair_b.tolist()):
+        ra, rb = find(a), find(bb)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    roots = np.array([find(x) for x in range(len(parent))], dtype=np.int64)
+
+    labels = np.full(rows * cols, -1, dtype=np.int64)
+    labels[passable.ravel()] = np.repeat(roots, end_c - start_c)
+    return labels
+
+
+def carve_to_start(codes, labels, size):
+    """
+    Joins the castle's region to the start's by turning mountains into grass along an
+    L-shaped road (up the castle's column, then along the top row) until the road reaches
+    the start's region. Returns the set of component ids the road connected.
+    """
+    start_label = labels[0]
+    connected = {int(start_label), int(labels[size * size - 1])}
+    road = [(r, size - 1) for r in range(size - 1, -1, -1)] + [(0, c) for c in range(size - 2, -1, -1)]
+    for r, c in road:
+        i = r * size + c
+        if labels[i] == start_label: break
+        if codes[r, c] == CODE_OF['M']:
+            codes[r, c] = CODE_OF['G']
+            labels[i] = start_label
+        else:
+            connected.add(int(labels[i]))
+    return connected
+
+
+def place_points(rng, codes, reachable, size):
+    """Towns, mystery spots and elders on distinct reachable tiles, sampled without replacement."""
+    flat = codes.ravel()
+    candidates = np.flatnonzero(reachable)
+    candidates = candidates[(candidates != 0) & (candidates != size * size - 1)]
+    factor = max(1.0, size * size / CLASSIC_AREA)
+    num_towns = int(rng.integers(TOWNS[0], TOWNS[1] + 1) * factor)
+    num_mystery = int(MYSTERY_SPOTS * factor)
+    num_elders = int(rng.integers(ELDERS[0], ELDERS[1] + 1) * factor)
+    total = min(num_towns + num_mystery + num_elders, len(candidates))
+    spots = candidates[rng.choice(len(candidates), total, replace=False)]
+    flat[spots[:num_towns]] = CODE_OF['T']
+    flat[spots[num_towns:num_towns + num_mystery]] = CODE_OF['?']
+    flat[spots[num_towns + num_mystery:]] = CODE_OF['E']
+
+    # A town within walking range of the start, so a fresh player can always heal
+    near = candidates[(candidates // size) + (candidates % size) <= SAFE_TOWN_RADIUS]
+    if len(near) and not (flat[near] == CODE_OF['T']).any():
+        flat[near[rng.integers(len(near))]] = CODE_OF['T']
+
+
+def generate_tiles(size, seed=None):
+    """
+    Builds a size x size map in bulk: noise biomes, a guaranteed passable route from the
+    start (0, 0) to the castle (size-1, size-1) that avoids mountains, and points of interest
+    on tiles reachable that way.
+    """
+    rng = np.random.default_rng(seed)
+    codes = biome_codes(rng, size)
+    codes[0, 0] = CODE_OF['G']
+    codes[size - 1, size - 1] = CODE_OF['K']
+
+    labels = run_components(codes != CODE_OF['M'])
+    connected = carve_to_start(codes, labels, size)
+    reachable = np.isin(labels, list(connected))
+    place_points(rng, codes, reachable, size)
+
+    tiles = TileGrid(size, size)
+    tiles.terrain = bytearray(codes.tobytes())
+    return tiles
+
+
+def generate_world(size, seed=None):
+    """A GridWorld on a noise-generated map, with the start tile cleared like the classic one."""
+    world = GridWorld.from_tiles(generate_tiles(size, seed))
+    world.tiles.mark_cleared(0, 0)
+    return world
+
+
+if __name__ == '__main__':
+    import time
+
+    from pathfinding import TravelPlanner
+
+    for size in (15, 256, 1024, 4096):
+        start = time.perf_counter()
+        world = generate_world(size, seed=1)
+        elapsed = time.perf_counter() - start
+        codes = np.frombuffer(world.tiles.terrain, dtype=np.uint8).reshape(size, size)
+        labels = run_components(codes != CODE_OF['M'])
+        assert labels[0] == labels[-1], "castle not reachable without crossing mountains"
+        shares = {key: float((codes == CODE_OF[key]).mean()) for key in 'FGMWT?E'}
+        print(f"{size}x{size}: {elapsed:.2f}s  " + "  ".join(f"{k} {v:.3f}" for k, v in shares.items()))
+    route = TravelPlanner(generate_world(64, seed=2)).find_path((0, 0), (63, 63))
+    print(f"64x64 route to castle: {len(route)} steps")
@@ -0,0 +1,78 @@
+class ObservableRecord:
+    """
+    Fixed-field record (__slots__, no per-instance dict) that reports real changes.
+    Assigning a field the value it already holds is not a change; every other assignment
+    calls each watcher as callback(key, value). Used for the engine's player stats and
+    inventory so views can refresh only what changed.
+
+    Subclasses list their fields in __slots__ and FIELDS. KEYS renames fields whose outside
+    name (save files, server protocol, watcher keys) is not a valid attribute name.
+    """
+
+    __slots__ = ('watchers',)
+    FIELDS = ()
+    KEYS = {}
+
+    def __init__(self, **values):
+        set_field = object.__setattr__
+        set_field(self, 'watchers', [])
+        for field in self.FIELDS:
+            set_field(self, field, values.pop(field))
+        if values:
+            raise TypeError(f"Unknown fields: {', '.join(values)}")
+
+    def watch(self, callback):
+        """Calls callback(key, value) after every change."""
+        self.watchers.append(callback)
+
+    def __setattr__(self, field, value):
+        if getattr(self, field) == value: return  # also rejects names that are not fields
+        object.__setattr__(self, field, value)
+        if self.watchers:
+            key = self.KEYS.get(field, field)
+            for callback in self.watchers:
+                callback(key, value)
+
+    def as_dict(self):
+        """{key: value} of every field, with KEYS applied."""
+        keys = self.KEYS
+        return {keys.get(field, field): getattr(self, field) for field in self.FIELDS}
+
+    def update(self, values):
+        """Assigns fields from an as_dict()-style mapping; watchers see each change."""
+        fields = {self.KEYS.get(field, field): field for field in self.FIELDS}
+        for key, value in values.items():
+            setattr(self, fields[key], value)
+
+    def __reduce__(self):
+        # Watchers belong to the process that registered them; copies start unwatched.
+        # Rebuilding through __init__ also keeps __setattr__ off the not-yet-filled slots.
+        return rebuild, (type(self), {field: getattr(self, field) for field in self.FIELDS})
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()})"
+
+
+def rebuild(cls, values):
+    """Unpickling helper for ObservableRecord: a new, unwatched record with these field values."""
+    return cls(**values)
+
+
+if __name__ == '__main__':
+    import copy
+    import pickle
+
+    from game_engine import GameEngine
+
+    # Copies and pickles keep the values, start without watchers and stay observable.
+    engine = GameEngine(seed=1)
+    for record in (engine.player_stats, engine.inventory):
+        seen = []
+        record.watch(lambda key, value: seen.append(key))
+        for clone in (copy.copy(record), copy.deepcopy(record), pickle.loads(pickle.dumps(record))):
+            assert type(clone) is type(record) and clone.as_dict() == record.as_dict(), clone
+            assert clone.watchers == [] and clone.watchers is not record.watchers
+            field = clone.FIELDS[0]
+            setattr(clone, field, getattr(clone, field) + 1)
+            assert clone.as_dict() != record.as_dict() and not seen
+        print(f"{record!r}: copy, deepcopy and pickle OK")
@@ -0,0 +1,334 @@
+import heapq
+from array import array
+
+from game_engine import DIRECTIONS
+from world import CODE_OF, TERRAIN_CODES
+
+# Expected HP lost per battle at level 1 ("python battle_sim.py"); higher levels lose less,
+# so this errs on the careful side.
+BATTLE_DAMAGE = 38.0
+MOUNTAIN_DAMAGE = 2
+EVENT_COST = 3.0  # extra cost of entering a tile that opens a dialogue (town, '?', elder)
+INF = float('inf')
+SEARCH_SLICE = 100  # tiles expanded between the yields of a search, see TravelPlanner.search
+STEP_OF = {delta: d for d, delta in DIRECTIONS.items()}
+
+
+class TravelPlanner:
+    """
+    Risk-aware route planning over a world. Entering a tile costs one step plus
+    damage_weight times the HP it is expected to cost: MOUNTAIN_DAMAGE on mountains,
+    battle_chance * battle_damage on uncleared forest/grassland.
+
+    find_path (A*) and find_nearest (Dijkstra) work on any world, including the endless
+    one; plan() runs the same searches in slices so a view can spread a long one over
+    several frames. On finite maps, add_field() also precomputes a distance field to a set
+    of target tiles (the castle, every town), so distance() is a lookup and route() just
+    walks downhill. Clearing a tile only ever lowers its cost, so tile_cleared() repairs
+    the fields by re-running Dijkstra outward from that tile, touching only the tiles whose
+    distance actually improves.
+
+    Costs and fields are float32 (4 bytes per tile each). Tile costs are multiples of a half
+    with the default weights, so sums stay exact far beyond any route length. A field
+    can also be built on a worker thread (begin_field, compute_field, install_field) while
+    the game runs and tiles get cleared.
+    """
+
+    def __init__(self, world, battle_chance=0.25, battle_damage=BATTLE_DAMAGE, damage_weight=1.0):
+        self.world = world
+        self.damage_weight = damage_weight
+        self.battle_cost = 1 + damage_weight * battle_chance * battle_damage
+        self.cleared_cost = 1.0
+        self.code_costs = [self.terrain_cost(key) for key in TERRAIN_CODES]
+        self.fields = {}  # name -> array of distances per tile (finite maps only)
+        self.costs = None
+        self.builds = 0        # fields being computed in the background
+        self.clear_log = []    # tiles cleared while a build runs, replayed by install_field
+        self.cancelled = False  # set by cancel() to abandon background builds
+        if world.map_size is not None:
+            self.build_costs()
+
+    def terrain_cost(self, key):
+        """Cost of entering an uncleared tile of this terrain."""
+        if key in ('F', 'G'):
+            return self.battle_cost
+        if key == 'M':
+            return 1 + self.damage_weight * MOUNTAIN_DAMAGE
+        if key in ('T', '?', 'E'):
+            return 1 + EVENT_COST
+        return 1.0
+
+    def tile_cost(self, r, c):
+        """Cost of stepping onto (r, c)."""
+        key = self.world.terrain_at(r, c)
+        if key in ('F', 'G') and self.world.is_cleared(r, c):
+            return self.cleared_cost
+        return self.code_costs[CODE_OF[key]]
+
+    def neighbours(self, r, c):
+        """In-bounds tiles one step away."""
+        in_bounds = self.world.in_bounds
+        for dr, dc in DIRECTIONS.values():
+            if in_bounds(r + dr, c + dc):
+                yield r + dr, c + dc
+
+    # --- SEARCH (any world) ---
+
+    def find_path(self, start, goal, max_nodes=200_000):
+        """A* from start to goal. Returns the tiles to walk (start excluded) or None."""
+        return finish(self.path_search(start, goal, max_nodes))
+
+    def find_nearest(self, start, terrain, max_nodes=200_000):
+        """Dijkstra to the cheapest-to-reach tile of a terrain. Returns the tiles to walk ([] if start is one) or None."""
+        return finish(self.nearest_search(start, terrain, max_nodes))
+
+    def path_search(self, start, goal, max_nodes=200_000):
+        """find_path as a search generator (see search)."""
+        gr, gc = goal
+        goal = tuple(goal)
+        return self.search(start, lambda pos: pos == goal,
+                           lambda r, c: abs(r - gr) + abs(c - gc), max_nodes)
+
+    def nearest_search(self, start, terrain, max_nodes=200_000, known=None):
+        """find_nearest as a search generator (see search); known(r, c), if given, must accept the goal tile."""
+        start = tuple(start)
+        terrain_at = self.world.terrain_at
+        return self.search(start, lambda pos: terrain_at(*pos) == terrain and (known is None or known(*pos)),
+                           lambda r, c: 0, max_nodes)
+
+    def search(self, start, is_goal, heuristic, max_nodes):
+        """
+        Best-first search over tile costs: A* with a Manhattan heuristic, Dijkstra with a
+        zero one. A generator that yields every SEARCH_SLICE expanded tiles, so the caller
+        decides how much of it runs at once, and returns the tiles to walk (or None).
+        """
+        start = tuple(start)
+        best = {start: 0.0}
+        came_from = {}
+        heap = [(heuristic(*start), 0.0, start)]
+        expanded = 0
+        while heap:
+            _, g, pos = heapq.heappop(heap)
+            if g > best[pos]: continue
+            if is_goal(pos):
+                return self.unwind(came_from, start, pos)
+            expanded += 1
+            if expanded > max_nodes: return None
+            if expanded % SEARCH_SLICE == 0:
+                yield expanded
+            for nxt in self.neighbours(*pos):
+                ng = g + self.tile_cost(*nxt)
+                if ng < best.get(nxt, INF):
+                    best[nxt] = ng
+                    came_from[nxt] = pos
+                    heapq.heappush(heap, (ng + heuristic(*nxt), ng, nxt))
+        return None
+
+    @staticmethod
+    def unwind(came_from, start, goal):
+        """Rebuilds the walked tiles from the search's back-pointers."""
+        path = [goal]
+        while path[-1] != start:
+            path.append(came_from[path[-1]])
+        path.pop()
+        path.reverse()
+        return path
+
+    # --- DISTANCE FIELDS (finite maps) ---
+
+    def build_costs(self):
+        """Flat per-tile cost array from the terrain bytes and the cleared bitset."""
+        tiles = self.world.tiles
+        self.costs = array('f', map(self.code_costs.__getitem__, tiles.terrain))
+        common = (CODE_OF['F'], CODE_OF['G'])
+        for byte_index, bits in enumerate(tiles.cleared):
+            if not bits: continue
+            for bit in range(8):
+                i = byte_index * 8 + bit
+                if bits >> bit & 1 and i < len(tiles.terrain) and tiles.terrain[i] in common:
+                    self.costs[i] = self.cleared_cost
+
+    def add_field(self, name, targets):
+        """Precomputes the cheapest cost from every tile to the nearest of the target tiles."""
+        self.fields[name] = self.compute_field(targets)
+
+    def compute_field(self, targets):
+        """
+        The cheapest cost from every tile to the nearest target, as a new array. It only
+        reads the costs, so it may run on a worker thread: bracket it with begin_field and
+        install_field on the game's thread. Returns None if cancel() stopped it.
+        """
+        n = self.world.map_size
+        dist = array('f', [INF]) * (n * n)
+        heap = []
+        for r, c in targets:
+            dist[r * n + c] = 0.0
+            heap.append((0.0, r * n + c))
+        heapq.heapify(heap)
+        self.relax(dist, heap)
+        return None if self.cancelled else dist
+
+    def begin_field(self):
+        """Starts a background build; returns the ticket to hand to install_field."""
+        self.builds += 1
+        return len(self.clear_log)
+
+    def install_field(self, name, dist, ticket):
+        """
+        Installs a field from compute_field, first repairing it for the tiles cleared since
+        begin_field (the build may have seen their old costs). A None field is dropped.
+        """
+        self.builds -= 1
+        if dist is not None:
+            for i in self.clear_log[ticket:]:
+                self.relax(dist, [(dist[i], i)])
+            self.fields[name] = dist
+        if not self.builds:
+            self.clear_log.clear()
+
+    def cancel(self):
+        """Makes running background builds stop early (e.g. when the game closes)."""
+        self.cancelled = True
+
+    def relax(self, dist, heap):
+        """Reverse Dijkstra: stepping from u onto v costs costs[v], so dist[u] = dist[v] + costs[v]."""
+        n = self.world.map_size
+        costs = self.costs
+        heappop, heappush = heapq.heappop, heapq.heappush
+        while heap and not self.cancelled:
+            d, v = heappop(heap)
+            if d > dist[v]: continue
+            nd = d + costs[v]
+            c = v % n
+            if v >= n and nd < dist[v - n]:
+                dist[v - n] = nd
+                heappush(heap, (nd, v - n))
+            if v + n < n * n and nd < dist[v + n]:
+                dist[v + n] = nd
+                heappush(heap, (nd, v + n))
+            if c > 0 and nd < dist[v - 1]:
+                dist[v - 1] = nd
+                heappush(heap, (nd, v - 1))
+            if c < n - 1 and nd < dist[v + 1]:
+                dist[v + 1] = nd
+                heappush(heap, (nd, v + 1))
+
+    def tile_cleared(self, r, c):
+        """Lowers a newly cleared tile's cost and repairs the distance fields around it."""
+        if self.costs is None: return
+        i = r * self.world.map_size + c
+        if self.costs[i] <= self.cleared_cost: return
+        self.costs[i] = self.cleared_cost
+        if self.builds:
+            self.clear_log.append(i)
+        for dist in self.fields.values():
+            self.relax(dist, [(dist[i], i)])
+
+    def distance(self, name, r, c):
+        """Field lookup: cost from (r, c) to the field's nearest target."""
+        return self.fields[name][r * self.world.map_size + c]
+
+    def descend(self, name, start):
+        """Walks a distance field downhill from start to its target. Returns the tiles to walk."""
+        dist = self.fields[name]
+        n = self.world.map_size
+        path = []
+        r, c = start
+        while dist[r * n + c] > 0:
+            r, c = min(self.neighbours(r, c), key=lambda p: self.costs[p[0] * n + p[1]] + dist[p[0] * n + p[1]])
+            path.append((r, c))
+        return path
+
+    # --- ROUTES ---
+
+    def route(self, start, target):
+        """Tiles to walk from start to 'castle' or to the nearest 'town': [] when already there, None if not found."""
+        return finish(self.plan(start, target))
+
+    def plan(self, start, target, known=None):
+        """
+        route() as a search generator (see search); a field lookup finishes without yielding.
+        With known(r, c) (e.g. fog of war: explored tiles) only known towns are targets, so
+        the town field, which covers every town, is not used.
+        """
+        start = tuple(start)
+        if target in self.fields and (target == 'castle' or known is None):
+            return self.descend(target, start)
+        if target == 'castle':
+            return (yield from self.path_search(start, self.world.castle_pos))
+        return (yield from self.nearest_search(start, 'T', known=known))
+
+
+def finish(search):
+    """Runs a search generator to the end and returns its result."""
+    while True:
+        try:
+            next(search)
+        except StopIteration as done:
+            return done.value
+
+
+def standard_targets(world, towns=True):
+    """(name, targets) of the castle and (unless towns is False) nearest-town distance fields for a finite map."""
+    positions = world.pois.positions('T') if towns else []
+    return [('castle', [world.castle_pos])] + ([('town', positions)] if positions else [])
+
+
+def add_standard_fields(planner):
+    """Castle and nearest-town distance fields for a finite map."""
+    for name, targets in standard_targets(planner.world):
+        planner.add_field(name, targets)
+
+
+def directions_along(start, path):
+    """Converts a list of tiles into the move directions that walk it."""
+    moves = []
+    r, c = start
+    for nr, nc in path:
+        moves.append(STEP_OF[(nr - r, nc - c)])
+        r, c = nr, nc
+    return moves
+
+
+if __name__ == '__main__':
+    import time
+
+    from game_engine import GameEngine
+
+    # Field build time, incremental repair time and query time on a large map.
+    # Also checks the repair of a background-built field and the sliced search.
+    for size in (15, 256, 1024):
+        engine = GameEngine(map_size=size, seed=1)
+        start = time.perf_counter()
+        planner = TravelPlanner(engine.world, engine.BATTLE_CHANCE)
+        add_standard_fields(planner)
+        built = time.perf_counter() - start
+
+        rng = engine.rng
+        start = time.perf_counter()
+        for _ in range(1000):
+            r, c = rng.randrange(size), rng.randrange(size)
+            if engine.world.terrain_at(r, c) in ('F', 'G') and engine.world.mark_cleared(r, c):
+                planner.tile_cleared(r, c)
+        repaired = (time.perf_counter() - start) / 1000
+
+        # A field built in the background misses the clears made meanwhile; installing repairs it
+        ticket = planner.begin_field()
+        late = planner.compute_field([engine.world.castle_pos])
+        for _ in range(100):
+            r, c = rng.randrange(size), rng.randrange(size)
+            if engine.world.terrain_at(r, c) in ('F', 'G') and engine.world.mark_cleared(r, c):
+                planner.tile_cleared(r, c)
+        planner.install_field('late', late, ticket)
+        assert planner.fields['late'] == planner.compute_field([engine.world.castle_pos]) == planner.fields['castle']
+
+        start = time.perf_counter()
+        path = planner.route((0, 0), 'castle')
+        routed = time.perf_counter() - start
+        astar = planner.find_path((0, 0), engine.world.castle_pos, max_nodes=size * size)
+        slices = sum(1 for _ in planner.path_search((0, 0), engine.world.castle_pos, max_nodes=size * size))
+        cost = sum(planner.tile_cost(*p) for p in path)
+        assert abs(cost - planner.distance('castle', 0, 0)) < 1e-6
+        assert abs(cost - sum(planner.tile_cost(*p) for p in astar)) < 1e-6
+        print(f"{size}x{size}: fields {built * 1000:.0f} ms, repair after a clear {repaired * 1000:.3f} ms, "
+              f"route to castle {routed * 1000:.2f} ms ({len(path)} steps, cost {cost:.1f}; A* in {slices + 1} slices)")
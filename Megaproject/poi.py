@@ -0,0 +1,196 @@
+from array import array
+
+# Terrain keys that are points of interest: towns, elder huts, mystery spots and the castle
+POI_KEYS = 'TE?K'
+
+
+class PoiIndex:
+    """
+    Points of interest bucketed on a coarse grid of bucket_size x bucket_size tiles.
+
+    Each bucket keeps, per terrain key, the POIs' offsets inside the bucket (2 bytes each),
+    so the index costs a few bytes per POI plus one small array per non-empty bucket.
+    Queries only visit the buckets that can hold an answer: nearest() searches rings of
+    buckets outward from the player and stops once no closer ring can beat the best hit,
+    which on a normal map is the player's bucket and its neighbours whatever the map size.
+    Distances are in steps (Manhattan), the way the player moves.
+    """
+
+    def __init__(self, bucket_size=16):
+        if not 0 < bucket_size <= 256:
+            raise ValueError("bucket_size must be between 1 and 256")
+        self.bucket_size = bucket_size
+        self.buckets = {key: {} for key in POI_KEYS}  # key -> {(bucket row, bucket col): array of offsets}
+        self.extent = None  # (min row, min col, max row, max col) of buckets ever filled
+
+    @classmethod
+    def from_terrain(cls, terrain, cols, codes, bucket_size=16):
+        """Indexes a row-major terrain bytearray (see world.TileGrid); codes maps terrain key -> code byte."""
+        index = cls(bucket_size)
+        index.add_terrain(terrain, cols, codes)
+        return index
+
+    def add_terrain(self, terrain, cols, codes, origin=(0, 0)):
+        """Adds the POIs of a row-major terrain block whose first tile is at origin."""
+        r0, c0 = origin
+        for key in POI_KEYS:
+            code = codes[key]
+            i = terrain.find(code)
+            while i != -1:
+                r, c = divmod(i, cols)
+                self.add(r0 + r, c0 + c, key)
+                i = terrain.find(code, i + 1)
+
+    def add(self, r, c, key):
+        """Adds one POI."""
+        n = self.bucket_size
+        bucket = (r // n, c // n)
+        offsets = self.buckets[key].get(bucket)
+        if offsets is None:
+            offsets = self.buckets[key][bucket] = array('H')
+            self.grow_extent(bucket)
+        offsets.append((r % n) * n + c % n)
+
+    def grow_extent(self, bucket):
+        br, bc = bucket
+        if self.extent is None:
+            self.extent = (br, bc, br, bc)
+        else:
+            r0, c0, r1, c1 = self.extent
+            self.extent = (min(r0, br), min(c0, bc), max(r1, br), max(c1, bc))
+
+    def drop_bucket(self, bucket):
+        """Forgets every POI in a bucket (e.g. an evicted chunk of the endless world)."""
+        for by_bucket in self.buckets.values():
+            by_bucket.pop(bucket, None)
+
+    def points(self, key, bucket):
+        """Yields the (r, c) of the key's POIs in one bucket."""
+        offsets = self.buckets[key].get(bucket)
+        if offsets:
+            n = self.bucket_size
+            base_r, base_c = bucket[0] * n, bucket[1] * n
+            for offset in offsets:
+                yield base_r + offset // n, base_c + offset % n
+
+    def positions(self, key):
+        """Every indexed POI of a key."""
+        return [pos for bucket in self.buckets[key] for pos in self.points(key, bucket)]
+
+    def nearest(self, r, c, key, max_steps=None):
+        """(steps, (row, col)) of the closest POI of the key, or None if there is none (within max_steps)."""
+        by_bucket = self.buckets[key]
+        if not by_bucket: return None
+        n = self.bucket_size
+        br, bc = r // n, c // n
+        r0, c0, r1, c1 = self.extent
+        last_ring = max(br - r0, r1 - br, bc - c0, c1 - bc)  # beyond it there are no buckets
+        if max_steps is not None:
+            last_ring = min(last_ring, max_steps // n + 1)
+        best = None
+        best_steps = max_steps + 1 if max_steps is not None else float('inf')
+        for ring in range(last_ring + 1):
+            # Every tile of ring k is at least (k - 1) * n + 1 steps away
+            if ring and (ring - 1) * n + 1 >= best_steps: break
+            for bucket in ring_buckets(br, bc, ring):
+                if bucket not in by_bucket: continue
+                for pr, pc in self.points(key, bucket):
+                    steps = abs(pr - r) + abs(pc - c)
+                    if steps < best_steps:
+                        best_steps, best = steps, (pr, pc)
+        return (best_steps, best) if best is not None else None
+
+    def within(self, r, c, radius, keys=POI_KEYS):
+        """[(steps, (row, col), key)] of the POIs at most radius steps away, closest first."""
+        found = []
+        for key, pos in self.in_rect(r - radius, c - radius, 2 * radius + 1, 2 * radius + 1, keys):
+            steps = abs(pos[0] - r) + abs(pos[1] - c)
+            if steps <= radius:
+                found.append((steps, pos, key))
+        found.sort()
+        return found
+
+    def in_rect(self, top, left, rows, cols, keys=POI_KEYS):
+        """[(key, (row, col))] of the POIs inside a rectangle of tiles, e.g. the camera view."""
+        n = self.bucket_size
+        bottom, right = top + rows - 1, left + cols - 1
+        found = []
+        for key in keys:
+            by_bucket = self.buckets[key]
+            for br in range(top // n, bottom // n + 1):
+                for bc in range(left // n, right // n + 1):
+                    if (br, bc) not in by_bucket: continue
+                    for pr, pc in self.points(key, (br, bc)):
+                        if top <= pr <= bottom and left <= pc <= right:
+                            found.append((key, (pr, pc)))
+        return found
+
+
+def ring_buckets(br, bc, ring):
+    """Buckets at Chebyshev distance ring from (br, bc)."""
+    if ring == 0:
+        yield br, bc
+        return
+    for col in range(bc - ring, bc + ring + 1):
+        yield br - ring, col
+        yield br + ring, col
+    for row in range(br - ring + 1, br + ring):
+        yield row, bc - ring
+        yield row, bc + ring
+
+
+# Compass arrows by (row sign, col sign)
+ARROWS = {(-1, 0): '↑', (1, 0): '↓', (0, -1): '←', (0, 1): '→',
+          (-1, -1): '↖', (-1, 1): '↗', (1, -1): '↙', (1, 1): '↘', (0, 0): '•'}
+
+
+def compass_arrow(r, c, target):
+    """8-way arrow from (r, c) towards target; diagonal unless one axis clearly dominates."""
+    dr, dc = target[0] - r, target[1] - c
+    if abs(dr) > 2 * abs(dc):
+        dc = 0
+    elif abs(dc) > 2 * abs(dr):
+        dr = 0
+    return ARROWS[(dr > 0) - (dr < 0), (dc > 0) - (dc < 0)]
+
+
+if __name__ == '__main__':
+    import random
+    import time
+
+    from world import CODE_OF, GridWorld
+
+    # Check nearest / within / in_rect against brute force, then time queries on a large map.
+    rng = random.Random(0)
+    world = GridWorld(64, random.Random(1))
+    index = PoiIndex.from_terrain(world.tiles.terrain, 64, CODE_OF, bucket_size=8)
+    tiles = [(r, c, world.terrain_at(r, c)) for r in range(64) for c in range(64)]
+    for _ in range(2000):
+        r, c = rng.randrange(-10, 74), rng.randrange(-10, 74)
+        for key in POI_KEYS:
+            dists = [abs(pr - r) + abs(pc - c) for pr, pc, k in tiles if k == key]
+            hit = index.nearest(r, c, key)
+            assert (hit[0] if hit else None) == (min(dists) if dists else None)
+        radius = rng.randrange(0, 20)
+        brute = sorted((abs(pr - r) + abs(pc - c), (pr, pc), k) for pr, pc, k in tiles
+                       if k in POI_KEYS and abs(pr - r) + abs(pc - c) <= radius)
+        assert index.within(r, c, radius) == brute
+
+    from mapgen import generate_world  # needs NumPy
+    size = 4096
+    world = generate_world(size, seed=1)
+    start = time.perf_counter()
+    index = PoiIndex.from_terrain(world.tiles.terrain, size, CODE_OF)
+    built = time.perf_counter() - start
+    total = sum(len(offsets) for by_bucket in index.buckets.values() for offsets in by_bucket.values())
+    queries = [(rng.randrange(size), rng.randrange(size)) for _ in range(20_000)]
+    start = time.perf_counter()
+    for r, c in queries:
+        index.nearest(r, c, 'T')
+    nearest = (time.perf_counter() - start) / len(queries)
+    start = time.perf_counter()
+    for r, c in queries[:2000]:
+        index.in_rect(r - 7, c - 7, 15, 15)
+    on_screen = (time.perf_counter() - start) / 2000
+    print(f"{size}x{size}: {total} POIs indexed in {built:.2f}s; nearest town {nearest * 1e6:.1f} us, "
+          f"on-screen {on_screen * 1e6:.1f} us")
@@ -0,0 +1,191 @@
+import struct
+
+from game_engine import DIRECTIONS, GameEngine
+from world import ChunkedWorld
+
+# A recording is a fixed header followed by one opcode byte per player input.
+# Everything random in a session comes from the engine's seeded rng (and, for the
+# endless map, the world seed), so seed + inputs reproduce the session exactly.
+MAGIC = b'OKRP'
+VERSION = 2
+HEADER = struct.Struct('<4sBBHQQ')  # magic, version, map generator, map size (0 = endless), engine seed, world seed
+CLASSIC_MAP, NOISE_MAP = 0, 1       # GridWorld's own generator, mapgen.generate_world
+ANSWER_LEN = struct.Struct('<H')
+
+MOVES = tuple(DIRECTIONS)  # opcodes 0..3
+OP_ATTACK = 4
+OP_CHOOSE = 5         # + 1 byte: the dialogue option
+OP_POTION = 6
+OP_MYSTERY_NO = 7
+OP_MYSTERY_YES = 8
+OP_RIDDLE = 9         # + u16 length + UTF-8 answer
+OP_CANCEL_RIDDLE = 10
+OP_FAST_OFF = 11      # fast-forward battles off / on
+OP_FAST_ON = 12
+
+SIMPLE_OPS = {
+    'attack': OP_ATTACK,
+    'potion': OP_POTION,
+    'cancel': OP_CANCEL_RIDDLE,
+}
+MOVE_OPS = {d: op for op, d in enumerate(MOVES)}
+
+
+class InputRecorder:
+    """
+    Records a session as seed + a compact binary input stream (1 byte for most inputs).
+    Call record(action, arg) with the same arguments given to GameEngine.step, before
+    the step runs, and save() when the session ends.
+    """
+
+    def __init__(self, seed, map_size=15, world_seed=0, generator=CLASSIC_MAP):
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, generator, map_size or 0, seed, world_seed))
+        self.count = 0
+
+    def record(self, action, arg=None):
+        """Appends one input to the stream."""
+        data = self.data
+        if action == 'move':
+            data.append(MOVE_OPS[arg])
+        elif action == 'choose':
+            data += bytes((OP_CHOOSE, arg))
+        elif action == 'mystery':
+            data.append(OP_MYSTERY_YES if arg else OP_MYSTERY_NO)
+        elif action == 'fast':
+            data.append(OP_FAST_ON if arg else OP_FAST_OFF)
+        elif action == 'riddle':
+            answer = arg.encode('utf-8')
+            data.append(OP_RIDDLE)
+            data += ANSWER_LEN.pack(len(answer))
+            data += answer
+        elif action in SIMPLE_OPS:
+            data.append(SIMPLE_OPS[action])
+        else:
+            raise ValueError(f"Unknown action: {action}")
+        self.count += 1
+
+    def save(self, path):
+        """Writes the recording to a file."""
+        with open(path, 'wb') as f:
+            f.write(self.data)
+
+
+def read_header(data):
+    """Returns (generator, map_size, seed, world_seed) from a recording; map_size is None for the endless map."""
+    magic, version, generator, map_size, seed, world_seed = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a game recording")
+    if version != VERSION:
+        raise ValueError(f"Unsupported recording version: {version}")
+    return generator, map_size or None, seed, world_seed
+
+
+def iter_inputs(data):
+    """Yields the recorded (action, arg) pairs in order."""
+    i = HEADER.size
+    end = len(data)
+    while i < end:
+        op = data[i]
+        i += 1
+        if op < OP_ATTACK:
+            yield 'move', MOVES[op]
+        elif op == OP_ATTACK:
+            yield 'attack', None
+        elif op == OP_CHOOSE:
+            yield 'choose', data[i]
+            i += 1
+        elif op == OP_POTION:
+            yield 'potion', None
+        elif op == OP_MYSTERY_NO or op == OP_MYSTERY_YES:
+            yield 'mystery', op == OP_MYSTERY_YES
+        elif op == OP_RIDDLE:
+            length, = ANSWER_LEN.unpack_from(data, i)
+            i += ANSWER_LEN.size
+            yield 'riddle', bytes(data[i:i + length]).decode('utf-8')
+            i += length
+        elif op == OP_CANCEL_RIDDLE:
+            yield 'cancel', None
+        elif op == OP_FAST_OFF or op == OP_FAST_ON:
+            yield 'fast', op == OP_FAST_ON
+        else:
+            raise ValueError(f"Bad opcode {op} at byte {i - 1}")
+
+
+def new_session(data):
+    """Builds the engine a recording starts from."""
+    generator, map_size, seed, world_seed = read_header(data)
+    world = None
+    if map_size is None:
+        world = ChunkedWorld(seed=world_seed)
+    elif generator == NOISE_MAP:
+        from mapgen import generate_world  # needs NumPy
+        world = generate_world(map_size, world_seed)
+    return GameEngine(map_size or 15, seed, world)
+
+
+def replay(data):
+    """Replays a recording headlessly as fast as possible. Returns the final engine."""
+    engine = new_session(data)
+    step = engine.step
+    for action, arg in iter_inputs(data):
+        step(action, arg)
+    return engine
+
+
+def load(path):
+    """Reads a recording file."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def session_summary(engine):
+    """The state a replay should reproduce: position, stats, inventory and outcome."""
+    return {
+        'pos': tuple(engine.player_pos),
+        'stats': engine.player_stats.as_dict(),
+        'inventory': engine.inventory.as_dict(),
+        'game_over': engine.game_over,
+        'won': engine.won,
+    }
+
+
+if __name__ == '__main__':
+    import random
+    import sys
+    import time
+
+    from game_engine import autoplay_action
+
+    if len(sys.argv) > 1:
+        # Replay a recorded session (e.g. from a bug report) and print where it ends.
+        data = load(sys.argv[1])
+        start = time.perf_counter()
+        engine = replay(data)
+        elapsed = time.perf_counter() - start
+        inputs = sum(1 for _ in iter_inputs(data))
+        print(f"{inputs} inputs ({len(data)} bytes) replayed in {elapsed * 1000:.1f} ms")
+        print(session_summary(engine))
+        sys.exit()
+
+    # Self-check: record scripted games, replay them and compare the outcomes.
+    policy_rng = random.Random(0)
+    recordings = []
+    expected = []
+    for seed in range(200):
+        engine = GameEngine(seed=seed)
+        recorder = InputRecorder(seed)
+        while not engine.game_over and recorder.count < 5000:
+            action, arg = autoplay_action(engine, policy_rng)
+            recorder.record(action, arg)
+            engine.step(action, arg)
+        recordings.append(bytes(recorder.data))
+        expected.append(session_summary(engine))
+
+    inputs = sum(len(list(iter_inputs(data))) for data in recordings)
+    size = sum(len(data) for data in recordings)
+    start = time.perf_counter()
+    results = [session_summary(replay(data)) for data in recordings]
+    elapsed = time.perf_counter() - start
+    assert results == expected, "replay diverged from the recorded session"
+    print(f"{len(recordings)} sessions, {inputs} inputs, {size / inputs:.2f} bytes/input")
+    print(f"replayed in {elapsed * 1000:.0f} ms ({inputs / elapsed:,.0f} inputs/s)")
@@ -0,0 +1,336 @@
+import asyncio
+import json
+import resource
+import time
+from collections import deque
+
+from game_engine import DIRECTIONS, GameEngine
+from world import MIN_MAP_SIZE
+
+# Line protocol. The client sends one command per line:
+#   move up|down|left|right, attack, potion, choose N, mystery yes|no, riddle ANSWER,
+#   cancel, fast on|off, new (fresh game), stats (server counters)
+# The server answers every command with exactly one compact JSON line. On connect (and after
+# 'new') that line is a full snapshot; after every other command it is a delta holding only
+# what changed: pos, stats / inv (changed keys only), mode, cleared tiles and the messages.
+MAX_LINE = 1024
+HIGH_WATER = 64 * 1024     # bytes queued for a client before we stop serving it (backpressure)
+SLOW_CLIENT_TIMEOUT = 10.0  # seconds a client may stay above HIGH_WATER before it is dropped
+YIELD_EVERY = 16           # commands a pipelining client gets before other sessions run
+LATENCY_SAMPLES = 100_000
+
+# Engine events the delta already covers through its own fields
+FOLDED_EVENTS = ('stats', 'inventory', 'moved', 'tile_cleared', 'battle_update')
+ON_OFF = {'on': True, 'yes': True, '1': True, 'off': False, 'no': False, '0': False}
+
+
+def encode(message):
+    """One protocol line."""
+    return json.dumps(message, separators=(',', ':'), ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def mode_of(engine):
+    """What the session is waiting for: explore, battle, town, riddle, mystery, won or dead."""
+    if engine.game_over:
+        return 'won' if engine.won else 'dead'
+    if engine.in_battle:
+        return 'battle'
+    return engine.dialogue_kind or 'explore'
+
+
+def parse_command(line):
+    """Turns a protocol line into (action, arg) for GameEngine.step or a server command."""
+    action, _, arg = line.strip().partition(' ')
+    if action == 'move':
+        if arg not in DIRECTIONS:
+            raise ValueError(f"Unknown direction: {arg}")
+        return action, arg
+    if action == 'choose':
+        if not arg.isdigit():
+            raise ValueError("choose expects an option number")
+        return action, int(arg)
+    if action in ('mystery', 'fast'):
+        if arg not in ON_OFF:
+            raise ValueError(f"{action} expects on/off or yes/no")
+        return action, ON_OFF[arg]
+    if action == 'riddle':
+        return action, arg
+    if action in ('attack', 'potion', 'cancel', 'new', 'stats'):
+        return action, None
+    raise ValueError(f"Unknown command: {action}")
+
+
+class Session:
+    """
+    One player's game on the server: the engine plus the stat and inventory keys changed
+    since the last reply (collected by ObservableRecord watchers, so deltas cost nothing to find).
+    """
+
+    def __init__(self, seed, map_size=15):
+        self.engine = GameEngine(map_size, seed)
+        self.mode = mode_of(self.engine)
+        self.changed_stats = {}
+        self.changed_items = {}
+        self.engine.player_stats.watch(self.changed_stats.__setitem__)
+        self.engine.inventory.watch(self.changed_items.__setitem__)
+
+    def snapshot(self):
+        """Everything a client needs to draw the game from scratch."""
+        engine = self.engine
+        world = engine.world
+        n = engine.map_size
+        self.changed_stats.clear()
+        self.changed_items.clear()
+        return {
+            'seed': engine.seed,
+            'size': n,
+            'tiles': ["".join(world.terrain_at(r, c) for c in range(n)) for r in range(n)],
+            'cleared': [(r, c) for r in range(n) for c in range(n) if world.is_cleared(r, c)],
+            'pos': engine.player_pos,
+            'stats': engine.player_stats.as_dict(),
+            'inv': engine.inventory.as_dict(),
+            'mode': self.mode,
+        }
+
+    def apply(self, action, arg):
+        """Runs one command on the engine and returns the delta for the client."""
+        engine = self.engine
+        delta = {}
+        events = []
+        cleared = []
+        for ev in engine.step(action, arg):
+            kind = ev['type']
+            if kind == 'tile_cleared':
+                cleared.append(ev['pos'])
+            elif kind == 'battle_update':
+                delta['enemy_hp'] = engine.enemy_stats.Health
+            elif kind == 'battle_start':
+                events.append({'type': kind, 'enemy': ev['enemy']._asdict(), 'enemy_stats': ev['enemy_stats'].as_dict()})
+            elif kind not in FOLDED_EVENTS:
+                events.append(ev)
+        if action == 'move':
+            delta['pos'] = engine.player_pos
+        if cleared:
+            delta['cleared'] = cleared
+        if self.changed_stats:
+            delta['stats'] = self.changed_stats.copy()
+            self.changed_stats.clear()
+        if self.changed_items:
+            delta['inv'] = self.changed_items.copy()
+            self.changed_items.clear()
+        mode = mode_of(engine)
+        if mode != self.mode:
+            delta['mode'] = self.mode = mode
+        if events:
+            delta['events'] = events
+        return delta
+
+
+class GameServer:
+    """
+    asyncio server hosting one Session per connection in a single process.
+
+    Each connection is served by one coroutine that reads a command, applies it and queues
+    the reply. Replies go through writer.drain(), which only waits once more than HIGH_WATER
+    bytes are queued for that client, and the next command is read only after that: a client
+    that stops reading stops being served (TCP pushes back on its sends) without holding up
+    anyone else, and is dropped if it stays stuck for SLOW_CLIENT_TIMEOUT.
+    Command latency (line read -> reply queued) is sampled for the p50/p99 report; time a
+    line waits while other sessions run shows up in the client round trip (see --bench).
+    """
+
+    def __init__(self, seed=0, map_size=15):
+        self.next_seed = seed
+        self.map_size = map_size
+        self.sessions = 0
+        self.commands = 0
+        self.dropped = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def new_session(self):
+        session = Session(self.next_seed, self.map_size)
+        self.next_seed += 1
+        return session
+
+    async def handle(self, reader, writer):
+        writer.transport.set_write_buffer_limits(high=HIGH_WATER)
+        session = self.new_session()
+        self.sessions += 1
+        latencies = self.latencies
+        served = 0
+        try:
+            writer.write(encode(session.snapshot()))
+            while True:
+                line = await reader.readline()
+                if not line: break
+                start = time.perf_counter()
+                try:
+                    action, arg = parse_command(line.decode('utf-8'))
+                except (ValueError, UnicodeDecodeError) as e:
+                    reply = {'error': str(e)}
+                else:
+                    if action == 'new':
+                        session = self.new_session()
+                        reply = session.snapshot()
+                    elif action == 'stats':
+                        reply = self.stats()
+                    else:
+                        reply = session.apply(action, arg)
+                writer.write(encode(reply))
+                self.commands += 1
+                latencies.append(time.perf_counter() - start)
+                await asyncio.wait_for(writer.drain(), SLOW_CLIENT_TIMEOUT)
+                served += 1
+                if served % YIELD_EVERY == 0:
+                    # readline/drain do not yield while data is buffered; let other sessions run
+                    await asyncio.sleep(0)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass  # client went away or sent an over-long line
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    def stats(self):
+        """Live sessions, totals and command latency percentiles in milliseconds."""
+        samples = sorted(self.latencies)
+        count = len(samples)
+
+        def percentile(q):
+            return round(samples[min(count - 1, int(q * count))] * 1000, 3) if count else None
+
+        return {
+            'sessions': self.sessions,
+            'commands': self.commands,
+            'dropped': self.dropped,
+            'p50_ms': percentile(0.50),
+            'p99_ms': percentile(0.99),
+            'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // 1024,
+        }
+
+    async def report(self, every):
+        """Prints the stats line every `every` seconds."""
+        last = self.commands
+        while True:
+            await asyncio.sleep(every)
+            stats = self.stats()
+            rate = (stats['commands'] - last) / every
+            last = stats['commands']
+            print(f"{stats['sessions']} sessions, {rate:,.0f} commands/s, p50 {stats['p50_ms']} ms, "
+                  f"p99 {stats['p99_ms']} ms, {stats['dropped']} dropped, {stats['rss_mb']} MB", flush=True)
+
+
+def raise_fd_limit():
+    """Every session is a socket: lift the soft open-file limit to the hard one."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def serve(host='127.0.0.1', port=8765, unix_path=None, seed=0, map_size=15, report_every=5.0):
+    """Runs the game server until cancelled."""
+    raise_fd_limit()
+    server = GameServer(seed, map_size)
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle, unix_path, limit=MAX_LINE, backlog=4096)
+    else:
+        listener = await asyncio.start_server(server.handle, host, port, limit=MAX_LINE, backlog=4096)
+    print(f"Serving on {unix_path or f'{host}:{port}'}", flush=True)
+    reporter = asyncio.create_task(server.report(report_every)) if report_every else None
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if reporter:
+            reporter.cancel()
+
+
+# --- LOAD TEST CLIENT ---
+
+BENCH_REPLIES = {
+    'battle': b'attack\n',
+    'town': b'choose 1\n',
+    'riddle': b'riddle shoe\n',
+    'mystery': b'mystery no\n',
+    'won': b'new\n',
+    'dead': b'new\n',
+}
+BENCH_MOVES = [f'move {d}\n'.encode() for d in ('down', 'right', 'down', 'right', 'up', 'left')]
+
+
+async def open_client(host, port, unix_path):
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path, limit=2 ** 20)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+    mode = json.loads(await reader.readline())['mode']
+    return reader, writer, mode
+
+
+async def bench_player(host, port, unix_path, until, rtts, rng):
+    """One active client: plays with a simple policy driven by the mode in each delta."""
+    reader, writer, mode = await open_client(host, port, unix_path)
+    while time.perf_counter() < until:
+        command = BENCH_REPLIES.get(mode) or rng.choice(BENCH_MOVES)
+        start = time.perf_counter()
+        writer.write(command)
+        reply = json.loads(await reader.readline())
+        rtts.append(time.perf_counter() - start)
+        mode = reply.get('mode', mode)
+    writer.close()
+
+
+async def bench(host, port, unix_path, idle, active, duration):
+    """Opens `idle` silent connections and `active` playing ones, then prints client and server latency."""
+    import random
+
+    raise_fd_limit()
+    idle_clients = []
+    for i in range(0, idle, 500):
+        idle_clients += await asyncio.gather(*(open_client(host, port, unix_path) for _ in range(min(500, idle - i))))
+    rtts = []
+    start = time.perf_counter()
+    until = start + duration
+    await asyncio.gather(*(bench_player(host, port, unix_path, until, rtts, random.Random(i)) for i in range(active)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer, _ = await open_client(host, port, unix_path)
+    writer.write(b'stats\n')
+    server_stats = json.loads(await reader.readline())
+    writer.close()
+    for _, idle_writer, _ in idle_clients:
+        idle_writer.close()
+
+    rtts.sort()
+    print(f"{idle} idle + {active} active sessions, {len(rtts)} commands in {elapsed:.1f}s "
+          f"({len(rtts) / elapsed:,.0f}/s)")
+    print(f"client round trip: p50 {rtts[len(rtts) // 2] * 1000:.2f} ms, p99 {rtts[int(len(rtts) * 0.99)] * 1000:.2f} ms")
+    print(f"server: {server_stats}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Multi-session game server (one JSON line per command).")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', metavar='PATH', help="listen on (or, with --bench, connect to) a Unix socket")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first session; each new one takes the next")
+    parser.add_argument('--size', type=int, default=15, help=f"map size (at least {MIN_MAP_SIZE})")
+    parser.add_argument('--report', type=float, default=5.0, help="seconds between stats lines (0 = off)")
+    parser.add_argument('--bench', action='store_true', help="load-test a running server instead of serving")
+    parser.add_argument('--idle', type=int, default=10_000, help="--bench: idle connections")
+    parser.add_argument('--active', type=int, default=1000, help="--bench: playing connections")
+    parser.add_argument('--duration', type=float, default=10.0, help="--bench: seconds of play")
+    args = parser.parse_args()
+    if args.size < MIN_MAP_SIZE:
+        parser.error(f"--size must be at least {MIN_MAP_SIZE}")
+
+    try:
+        if args.bench:
+            asyncio.run(bench(args.host, args.port, args.unix, args.idle, args.active, args.duration))
+        else:
+            asyncio.run(serve(args.host, args.port, args.unix, args.seed, args.size, args.report))
+    except KeyboardInterrupt:
+        pass
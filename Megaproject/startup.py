@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class StartupLoader:
+    """
+    Runs independent startup steps (audio, images, world generation) on a thread pool
+    while the window is already on screen. Each step's result is handed to its callback
+    on the Tk thread, so callbacks may create widgets and PhotoImages. A step that raises
+    goes to its on_error(exception) instead, or, without one, prints a warning and hands
+    on_done a None result (fine for optional steps like audio). It also records
+    time-to-first-frame and time-to-fully-loaded for the startup benchmark.
+    """
+
+    def __init__(self, master, max_workers=4, poll_ms=10):
+        self.master = master
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="startup")
+        self.start = time.perf_counter()
+        self.pending = []   # [name, future, on_done, on_error]
+        self.timings = {}   # step name or milestone -> seconds since start
+        self.on_all_done = None
+        self.polling = False
+        self.closed = False  # set by shutdown(), e.g. from a callback that closed the window
+
+    def submit(self, name, fn, on_done, *args, on_error=None):
+        """Runs fn(*args) on a worker; on_done(result) or on_error(exception) later runs on the Tk thread."""
+        self.pending.append([name, self.executor.submit(fn, *args), on_done, on_error])
+        if not self.polling:
+            self.polling = True
+            self.master.after(self.poll_ms, self.poll)
+
+    def poll(self):
+        """Delivers finished steps to their callbacks; reschedules itself until all are done."""
+        if self.closed: return
+        still_pending = []
+        for step in self.pending:
+            name, future, on_done, on_error = step
+            if not future.done():
+                still_pending.append(step)
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                if on_error:
+                    on_error(e)
+                else:
+                    print(f"Warning: startup step '{name}' failed. Error: {e}")
+                    on_done(None)
+            else:
+                on_done(result)
+            if self.closed:
+                return  # the callback closed the game: the master may be destroyed, do not reschedule
+            self.timings[name] = time.perf_counter() - self.start
+        self.pending = still_pending
+
+        if self.pending:
+            self.master.after(self.poll_ms, self.poll)
+            return
+        self.polling = False
+        self.timings['fully_loaded'] = time.perf_counter() - self.start
+        if self.on_all_done:
+            self.on_all_done()
+
+    def mark_first_frame(self):
+        """Records the moment Tk first went idle with the window built (first frame drawn)."""
+        self.timings.setdefault('first_frame', time.perf_counter() - self.start)
+
+    def report(self):
+        """Human-readable timing summary, milliseconds since the window was created."""
+        lines = ["Startup benchmark (ms since window creation):"]
+        for name, seconds in sorted(self.timings.items(), key=lambda item: item[1]):
+            lines.append(f"  {name:<14} {seconds * 1000:8.1f}")
+        return "\n".join(lines)
+
+    def shutdown(self):
+        """Abandons steps that have not started; running ones finish in the background, undelivered."""
+        self.closed = True
+        self.pending = []
+        self.polling = False
+        self.executor.shutdown(wait=False, cancel_futures=True)
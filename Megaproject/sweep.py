@@ -0,0 +1,132 @@
+import itertools
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from game_engine import GameEngine, autoplay_action
+
+# Rule attributes of GameEngine a sweep can vary, with their defaults.
+RULES = {
+    'BATTLE_CHANCE': 0.25,
+    'CRIT_CHANCE': 0.20,
+    'CRIT_MULTIPLIER': 1.5,
+    'XP_GROWTH': 1.5,
+    'LEVEL_HEALTH': 20,
+    'LEVEL_ATTACK': 5,
+    'POTION_PRICE': 25,
+}
+MAX_ACTIONS = 20_000  # a run that has not ended by then counts as a timeout
+BATCH_SIZE = 500      # runs per pool task; big enough that IPC is noise
+
+
+def play_run(rules, seed, max_actions=MAX_ACTIONS):
+    """Plays one full seeded game with the scripted policy. Returns (outcome, death terrain, progress, level, gold)."""
+    engine = GameEngine(seed=seed)
+    for name, value in rules.items():
+        setattr(engine, name, value)
+    engine.fast_battles = True  # same outcomes as clicking through every round, without the events
+    policy_rng = random.Random(seed)
+    step = engine.step
+    for _ in range(max_actions):
+        if engine.game_over: break
+        step(*autoplay_action(engine, policy_rng))
+    engine.events.clear()
+    r, c = engine.player_pos
+    progress = (r + c) / (2 * (engine.map_size - 1))  # 0 at the start, 1 at the castle
+    if engine.won:
+        outcome, terrain = 'won', None
+    elif engine.game_over:
+        outcome, terrain = 'died', engine.world.terrain_at(r, c)
+    else:
+        outcome, terrain = 'timeout', None
+    return outcome, terrain, progress, engine.player_stats.Level, engine.player_stats.Gold
+
+
+def run_batch(config_index, rules, seeds):
+    """Pool task: plays a batch of runs for one configuration and returns summed counters."""
+    totals = Counter()
+    death_terrain = Counter()
+    for seed in seeds:
+        outcome, terrain, progress, level, gold = play_run(rules, seed)
+        totals['runs'] += 1
+        totals[outcome] += 1
+        totals['level'] += level
+        totals['gold'] += gold
+        if outcome == 'died':
+            totals['death_progress'] += progress
+            death_terrain[terrain] += 1
+    return config_index, totals, death_terrain
+
+
+def configurations(grid):
+    """Every combination of the swept values, as rule dicts (unswept rules keep their defaults)."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def sweep(grid, runs, processes=None, seed=0):
+    """
+    Plays `runs` seeded games for every configuration of the grid across a process pool.
+    Configuration k uses seeds seed + k * runs ... so each one sees different maps, but
+    re-running a sweep reproduces it exactly. Returns [(rules, totals, death terrain)].
+    """
+    configs = configurations(grid)
+    results = [(rules, Counter(), Counter()) for rules in configs]
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        jobs = []
+        for k, rules in enumerate(configs):
+            first = seed + k * runs
+            for start in range(first, first + runs, BATCH_SIZE):
+                seeds = range(start, min(start + BATCH_SIZE, first + runs))
+                jobs.append(pool.submit(run_batch, k, rules, seeds))
+        for job in as_completed(jobs):
+            k, totals, death_terrain = job.result()
+            results[k][1].update(totals)
+            results[k][2].update(death_terrain)
+    return results
+
+
+def format_table(results):
+    """One row per configuration: outcome rates, where deaths happen, final level and gold."""
+    swept = list(results[0][0]) if results else []
+    header = "".join(f"{name:>16}" for name in swept)
+    lines = [f"{header}    Runs   Win%  Died%  Tmout%  Death@  Killed by         Lvl    Gold"]
+    for rules, totals, death_terrain in results:
+        runs = totals['runs']
+        died = totals['died']
+        where = ", ".join(f"{key} {count / died:.0%}" for key, count in death_terrain.most_common(2)) if died else "-"
+        progress = f"{totals['death_progress'] / died:6.2f}" if died else "     -"
+        values = "".join(f"{rules[name]:>16}" for name in swept)
+        lines.append(f"{values} {runs:7d} {totals['won'] / runs:6.1%} {died / runs:6.1%} {totals['timeout'] / runs:6.1%}"
+                     f"  {progress}  {where:<16} {totals['level'] / runs:5.2f} {totals['gold'] / runs:7.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Full-game balance sweep with the scripted policy.")
+    parser.add_argument('--runs', type=int, default=2000, help="runs per configuration")
+    parser.add_argument('--processes', type=int, default=os.cpu_count())
+    parser.add_argument('--seed', type=int, default=0)
+    for name, default in RULES.items():
+        parser.add_argument('--' + name.lower().replace('_', '-'), metavar='V1,V2,...',
+                            help=f"values to sweep (default {default})")
+    args = parser.parse_args()
+
+    grid = {}
+    for name, default in RULES.items():
+        values = getattr(args, name.lower())
+        if values:
+            grid[name] = [type(default)(v) for v in values.split(',')]
+    if not grid:
+        grid = {'BATTLE_CHANCE': [0.15, 0.25, 0.35], 'POTION_PRICE': [15, 25]}
+
+    start = time.perf_counter()
+    results = sweep(grid, args.runs, args.processes, args.seed)
+    elapsed = time.perf_counter() - start
+    total = sum(totals['runs'] for _, totals, _ in results)
+    print(format_table(results))
+    print(f"{total} runs in {elapsed:.1f}s on {args.processes} processes ({total / elapsed:,.0f} runs/s)")
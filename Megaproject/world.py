@@ -0,0 +1,270 @@
+import random
+
+from poi import PoiIndex
+
+
+# Terrain code table: a tile stores the index of its key in this string.
+TERRAIN_CODES = 'FMWTG?KE'
+CODE_OF = {key: code for code, key in enumerate(TERRAIN_CODES)}
+
+# Terrain picks for ordinary tiles: forest and grassland appear twice as often.
+TERRAIN_KEYS = ['F', 'M', 'W', 'G', 'F', 'G']
+TERRAIN_KEY_CODES = [CODE_OF[key] for key in TERRAIN_KEYS]
+
+# Smallest finite map the game accepts (--size): smaller ones have barely any room
+# between the start and the castle for the towns, elders and mystery spots.
+MIN_MAP_SIZE = 8
+
+
+class TileGrid:
+    """
+    rows x cols map stored compactly: one terrain code byte per tile (see TERRAIN_CODES)
+    and the cleared layer as a packed bitset, one bit per tile.
+    A 4096x4096 map costs 16 MB of terrain plus 2 MB of cleared bits.
+    """
+
+    def __init__(self, rows, cols, fill='G'):
+        self.rows = rows
+        self.cols = cols
+        self.terrain = bytearray([CODE_OF[fill]]) * (rows * cols)
+        self.cleared = bytearray((rows * cols + 7) >> 3)
+
+    def terrain_at(self, r, c):
+        """Returns the terrain key of a tile."""
+        return TERRAIN_CODES[self.terrain[r * self.cols + c]]
+
+    def set_terrain(self, r, c, key):
+        """Stores a terrain key at a tile."""
+        self.terrain[r * self.cols + c] = CODE_OF[key]
+
+    def is_cleared(self, r, c):
+        """Reads the tile's bit in the cleared bitset."""
+        i = r * self.cols + c
+        return bool(self.cleared[i >> 3] >> (i & 7) & 1)
+
+    def mark_cleared(self, r, c):
+        """Sets the tile's cleared bit. Returns True if it was not set before."""
+        i = r * self.cols + c
+        mask = 1 << (i & 7)
+        if self.cleared[i >> 3] & mask: return False
+        self.cleared[i >> 3] |= mask
+        return True
+
+    @property
+    def nbytes(self):
+        """Bytes used by the terrain and cleared buffers."""
+        return len(self.terrain) + len(self.cleared)
+
+
+class GridWorld:
+    """The classic fixed map: a map_size x map_size grid with the castle in the far corner."""
+
+    def __init__(self, map_size, rng):
+        self.map_size = map_size
+        self.castle_pos = (map_size - 1, map_size - 1)
+        self.tiles = TileGrid(map_size, map_size)
+        self.generate(rng)
+
+        # Cleared layer prevents battles on revisited common tiles (F, G)
+        self.tiles.mark_cleared(0, 0)  # Starting tile is considered cleared
+        self.pois = PoiIndex.from_terrain(self.tiles.terrain, map_size, CODE_OF)
+
+    def generate(self, rng):
+        """Creates the initial game map with terrains and special spots."""
+        size = self.map_size
+        tiles = self.tiles
+        tiles.terrain[:] = bytearray(rng.choice(TERRAIN_KEY_CODES) for _ in range(size * size))
+        tiles.set_terrain(0, 0, 'G')
+        tiles.set_terrain(size - 1, size - 1, 'K')
+        # Special spots go on the interior; the counts are capped so tiny maps cannot loop forever
+        interior = max(size - 2, 0) ** 2
+        num_towns = min(rng.randint(3, 6), interior)
+        towns_placed = 0
+        while towns_placed < num_towns:
+            tr, tc = rng.randint(1, size - 2), rng.randint(1, size - 2)
+            if tiles.terrain_at(tr, tc) not in ['T', 'K'] and (tr, tc) != (0, 0):
+                tiles.set_terrain(tr, tc, 'T')
+                towns_placed += 1
+
+        # Place '?' mystery spots
+        for _ in range(4 if interior else 0):
+            tiles.set_terrain(rng.randint(1, size - 2), rng.randint(1, size - 2), '?')
+
+        # Place 'E' Elder's hut spots
+        free = interior - tiles.terrain.count(CODE_OF['T']) - tiles.terrain.count(CODE_OF['?'])
+        num_elders = min(rng.randint(2, 4), free)
+        elders_placed = 0
+        while elders_placed < num_elders:
+            er, ec = rng.randint(1, size - 2), rng.randint(1, size - 2)
+            if tiles.terrain_at(er, ec) not in ['T', 'K', '?', 'E'] and (er, ec) != (0, 0):
+                tiles.set_terrain(er, ec, 'E')
+                elders_placed += 1
+
+    def in_bounds(self, r, c):
+        """True if (r, c) lies on the grid."""
+        return 0 <= r < self.map_size and 0 <= c < self.map_size
+
+    def terrain_at(self, r, c):
+        """Returns the terrain key of a tile."""
+        return TERRAIN_CODES[self.tiles.terrain[r * self.map_size + c]]
+
+    def is_cleared(self, r, c):
+        """True if battles can no longer trigger on this tile."""
+        return self.tiles.is_cleared(r, c)
+
+    def mark_cleared(self, r, c):
+        """Marks a tile as cleared. Returns True if it was not cleared before."""
+        return self.tiles.mark_cleared(r, c)
+
+    def keep_around(self, r, c):
+        """Nothing to load or evict: the whole grid is always in memory."""
+
+    def load_area(self, top, left, bottom, right):
+        """Nothing to load: every tile (and POI) of the grid is always in memory."""
+
+    @classmethod
+    def from_tiles(cls, tiles, pois=None):
+        """Wraps an existing TileGrid (e.g. from a save file) without generating a map; indexes its POIs unless given."""
+        world = cls.__new__(cls)
+        world.map_size = tiles.rows
+        world.castle_pos = (tiles.rows - 1, tiles.cols - 1)
+        world.tiles = tiles
+        world.pois = pois if pois is not None else PoiIndex.from_terrain(tiles.terrain, tiles.cols, CODE_OF)
+        return world
+
+    def cleared_layers(self):
+        """The cleared bitsets by key; the whole grid is a single layer."""
+        return {(0, 0): self.tiles.cleared}
+
+    def cleared_layer(self, key):
+        """The cleared bitset stored under key."""
+        return self.tiles.cleared
+
+    def cleared_position(self, r, c):
+        """(layer key, byte index) of the byte holding the tile's cleared bit."""
+        return (0, 0), (r * self.map_size + c) >> 3
+
+
+class ChunkedWorld:
+    """
+    Unbounded world generated lazily in chunk_size x chunk_size chunks.
+    Each chunk's terrain comes from a seed derived from (world seed, chunk row, chunk col),
+    so an evicted chunk is regenerated identically when the player returns. Only chunks
+    within keep_radius of the player's chunk stay loaded; the cleared layer is kept
+    separately per chunk because it is player progress, not generated content.
+    The POI index uses the chunks as its buckets and holds the loaded chunks' POIs.
+    """
+
+    map_size = None
+
+    def __init__(self, seed=None, chunk_size=16, keep_radius=2, castle_pos=(127, 127)):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.chunk_size = chunk_size
+        self.keep_radius = keep_radius
+        self.castle_pos = tuple(castle_pos)
+        self.chunks = {}   # (chunk row, chunk col) -> bytearray of terrain codes
+        self.cleared = {}  # (chunk row, chunk col) -> packed bitset of cleared tiles
+        self.center_chunk = None
+        self.pois = PoiIndex(chunk_size)
+        self.mark_cleared(0, 0)  # Starting tile is considered cleared
+
+    def chunk_of(self, r, c):
+        """Returns ((chunk row, chunk col), index inside the chunk) for a tile."""
+        n = self.chunk_size
+        return (r // n, c // n), (r % n) * n + (c % n)
+
+    def generate_chunk(self, key):
+        """Builds a chunk's terrain deterministically from its per-chunk seed."""
+        n = self.chunk_size
+        rng = random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+        tiles = bytearray(rng.choice(TERRAIN_KEY_CODES) for _ in range(n * n))
+
+        # Towns, mystery spots and elders go on distinct tiles, sampled without rejection loops
+        num_towns = rng.randint(3, 6)
+        num_elders = rng.randint(2, 4)
+        spots = rng.sample(range(n * n), num_towns + 4 + num_elders)
+        for i in spots[:num_towns]:
+            tiles[i] = CODE_OF['T']
+        for i in spots[num_towns:num_towns + 4]:
+            tiles[i] = CODE_OF['?']
+        for i in spots[num_towns + 4:]:
+            tiles[i] = CODE_OF['E']
+
+        # Fixed landmarks override whatever the chunk rolled
+        for (r, c), landmark in (((0, 0), 'G'), (self.castle_pos, 'K')):
+            chunk, index = self.chunk_of(r, c)
+            if chunk == key:
+                tiles[index] = CODE_OF[landmark]
+        return tiles
+
+    def load_chunk(self, key):
+        """Returns a chunk's terrain, generating it if it is not loaded."""
+        tiles = self.chunks.get(key)
+        if tiles is None:
+            tiles = self.chunks[key] = self.generate_chunk(key)
+            n = self.chunk_size
+            self.pois.add_terrain(tiles, n, CODE_OF, origin=(key[0] * n, key[1] * n))
+        return tiles
+
+    def in_bounds(self, r, c):
+        """Every tile exists in an unbounded world."""
+        return True
+
+    def terrain_at(self, r, c):
+        """Returns the terrain key of a tile, loading its chunk on demand."""
+        key, index = self.chunk_of(r, c)
+        return TERRAIN_CODES[self.load_chunk(key)[index]]
+
+    def is_cleared(self, r, c):
+        """True if battles can no longer trigger on this tile."""
+        key, index = self.chunk_of(r, c)
+        bits = self.cleared.get(key)
+        return bits is not None and bool(bits[index >> 3] >> (index & 7) & 1)
+
+    def mark_cleared(self, r, c):
+        """Marks a tile as cleared. Returns True if it was not cleared before."""
+        key, index = self.chunk_of(r, c)
+        bits = self.cleared_layer(key)
+        mask = 1 << (index & 7)
+        if bits[index >> 3] & mask: return False
+        bits[index >> 3] |= mask
+        return True
+
+    def keep_around(self, r, c):
+        """Evicts loaded chunks farther than keep_radius chunks from the tile (r, c)."""
+        n = self.chunk_size
+        center = (r // n, c // n)
+        if center == self.center_chunk: return
+        self.center_chunk = center
+        radius = self.keep_radius
+        for key in [k for k in self.chunks
+                    if abs(k[0] - center[0]) > radius or abs(k[1] - center[1]) > radius]:
+            del self.chunks[key]
+            self.pois.drop_bucket(key)
+
+    def load_area(self, top, left, bottom, right):
+        """
+        Loads every chunk overlapping the tile rectangle, so POI queries over it see all of
+        its POIs. The chunks stay until keep_around evicts them, so a caller that queries
+        around the player every move should keep keep_radius as large as its area.
+        """
+        n = self.chunk_size
+        for row in range(top // n, bottom // n + 1):
+            for col in range(left // n, right // n + 1):
+                self.load_chunk((row, col))
+
+    def cleared_layers(self):
+        """The cleared bitsets by chunk key (only chunks with cleared tiles have one)."""
+        return self.cleared
+
+    def cleared_layer(self, key):
+        """The cleared bitset of a chunk, created empty if it has none yet."""
+        bits = self.cleared.get(key)
+        if bits is None:
+            bits = self.cleared[key] = bytearray((self.chunk_size * self.chunk_size + 7) >> 3)
+        return bits
+
+    def cleared_position(self, r, c):
+        """(chunk key, byte index) of the byte holding the tile's cleared bit."""
+        key, index = self.chunk_of(r, c)
+        return key, index >> 3